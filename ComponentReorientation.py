@@ -1,12 +1,30 @@
 # Assuming you have not changed the general structure of the template no modification is needed in this file.
+import os
+import time
+
+_import_start = time.perf_counter()
+
 from . import commands
 from .lib import fusionAddInUtils as futil
 
+# Seconds spent importing the commands and the utilities.
+_import_time = time.perf_counter() - _import_start
+
 
 def run(context):
     try:
         # This will run the start function in each of your commands as defined in commands/__init__.py
+        start = time.perf_counter()
         commands.start()
+        start_time = time.perf_counter() - start
+
+        futil.record_time('startup.import', _import_time)
+        futil.log(
+            f'Add-in started in {(_import_time + start_time) * 1000:.1f} ms '
+            f'(imports {_import_time * 1000:.1f} ms, commands {start_time * 1000:.1f} ms)\n'
+            f'{commands.startup_report()}'
+        )
+        futil.flush_log()
 
     except:
         futil.handle_error('run')
@@ -14,11 +32,17 @@ def run(context):
 
 def stop(context):
     try:
+        # Write the handler timings and API call counters collected while config.PROFILE is on.
+        if futil.is_profiling():
+            futil.export_profile(os.path.join(os.path.dirname(__file__), 'profile_report.json'))
+
         # Remove all of the event handlers your app has created
         futil.clear_handlers()
 
         # This will run the start function in each of your commands as defined in commands/__init__.py
         commands.stop()
 
+        futil.flush_log()
+
     except:
-        futil.handle_error('stop')
\ No newline at end of file
+        futil.handle_error('stop')
@@ -0,0 +1,213 @@
+"""Offline benchmark of the reorient command hot paths.
+
+Runs reorientComponent's command_preview and command_execute against the
+simulated Fusion object model in benchmarks/fake_adsk, over synthetic flat
+assemblies, and reports the time per call, the number of simulated API calls and
+the peak Python memory.
+
+Usage:
+    python benchmarks/bench_reorient.py [--sizes 10 100 1000] [--instances 100]
+                                        [--previews 20] [--latency 0.00002]
+                                        [--compute-latency 0.001] [--sessions 2]
+                                        [--json FILE]
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+import types
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ADDIN_DIR = os.path.dirname(BENCH_DIR)
+PACKAGE_NAME = 'ComponentReorientation'
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+
+# Milliseconds spent importing and starting the commands, and loading the reorient
+# command, filled by load_addin.
+startup = {}
+
+
+def load_addin():
+    """Imports the add-in package against the simulated adsk modules, starts its
+    commands and returns the adsk module and the reorientComponent entry module."""
+    sys.path.insert(0, os.path.join(BENCH_DIR, 'fake_adsk'))
+    import adsk
+    import adsk.core
+    import adsk.fusion
+
+    # Fusion imports the add-in folder as a package, mirror that so the relative
+    # imports resolve whatever the checkout directory is called.
+    if PACKAGE_NAME not in sys.modules:
+        package = types.ModuleType(PACKAGE_NAME)
+        package.__path__ = [ADDIN_DIR]
+        sys.modules[PACKAGE_NAME] = package
+
+    # Create the buttons like the add-in's run does, then load the reorient command
+    # like its first click would, timing both.
+    start = time.perf_counter()
+    commands = importlib.import_module(f'{PACKAGE_NAME}.commands')
+    if not commands.startup_times:
+        commands.start()
+    startup['start_ms'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    entry = commands.commands[0].load()
+    startup['first_load_ms'] = (time.perf_counter() - start) * 1000
+
+    # Only report warnings and errors, info logging would dominate the timings.
+    entry.futil.set_log_level(adsk.core.LogLevels.WarningLogLevel)
+    return adsk, entry
+
+
+def build_assembly(adsk, occurrences: int, instances: int):
+    """Creates a design with the given number of occurrences, each component being
+    instanced instances times. Returns the design and the first occurrence."""
+    design = adsk.fusion.Design(f'assembly_{occurrences}')
+    component = None
+    for i in range(occurrences):
+        if i % instances == 0:
+            component = design.add_component(f'part{i // instances}')
+        transform = adsk.core.Matrix3D()
+        transform._m[3], transform._m[7], transform._m[11] = float(i % 97), float(i // 97 % 89), float(i // 8633)
+        design.add_occurrence(component, transform)
+    return design, design.rootComponent._children[0]
+
+
+def run_command(adsk, entry, design, occurrence, previews: int):
+    """Drives one command session: creation, face selection, previews with a
+    moving triad, the full preview once the triad settles and execute. Returns
+    the timings in seconds and the number of full previews."""
+    app = adsk.core.Application.get()
+    app.activeProduct = design
+    app.activeDocument = design
+
+    definition = app.userInterface.commandDefinitions.itemById(entry.CMD_ID)
+    command = definition.execute()
+    inputs = command.commandInputs
+
+    # Select the side face of the first occurrence, so the body has to rotate.
+    face = occurrence.bRepBodies.item(0).faces.item(2)
+    select_face_input = inputs.itemById('selectFaceInput')
+    select_face_input.addSelection(face)
+    command.inputChanged.fire(adsk.core.InputChangedEventArgs(select_face_input, inputs))
+
+    triad_input = inputs.itemById('triadInput')
+    preview_times = []
+    for i in range(previews):
+        # Nudge the triad like a drag would.
+        rotation = adsk.core.Matrix3D()
+        rotation.setToRotateTo(adsk.core.Vector3D(1, 0, 0), adsk.core.Vector3D(1, 0.01 * (i + 1), 0))
+        triad_input.transform = rotation
+        command.inputChanged.fire(adsk.core.InputChangedEventArgs(triad_input, inputs))
+
+        # Fusion rolls back everything a preview changed.
+        design.begin_transaction()
+        start = time.perf_counter()
+        command.executePreview.fire(adsk.core.CommandEventArgs(command))
+        preview_times.append(time.perf_counter() - start)
+        design.abort_transaction()
+
+    # Wait for the triad to count as released, the preview scheduler then renders
+    # the latest state in full.
+    while entry.preview_jobs.pending:
+        time.sleep(0.005)
+        design.begin_transaction()
+        adsk.doEvents()
+        design.abort_transaction()
+    full_previews = entry.session.scheduler.full
+
+    start = time.perf_counter()
+    command.execute.fire(adsk.core.CommandEventArgs(command))
+    execute_time = time.perf_counter() - start
+
+    command.destroy.fire(adsk.core.CommandEventArgs(command))
+    app.userInterface.commandTerminated.fire(adsk.core.ApplicationCommandEventArgs(entry.CMD_ID))
+    return preview_times, execute_time, full_previews
+
+
+def benchmark(sizes, instances: int, previews: int, latency: float, compute_latency: float, sessions: int = 2) -> list:
+    adsk, entry = load_addin()
+    adsk.set_latency(latency, compute_latency)
+
+    results = []
+    for size in sizes:
+        design, occurrence = build_assembly(adsk, size, min(instances, size))
+
+        adsk.reset_calls()
+        tracemalloc.start()
+        preview_times, execute_time, full_previews = run_command(adsk, entry, design, occurrence, previews)
+        memory_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        api_calls = dict(adsk.calls)
+
+        # Later sessions on the same design reuse the caches and the occurrence
+        # index built by the first one.
+        repeat_execute_times = []
+        repeat_api_calls = []
+        for _ in range(sessions - 1):
+            adsk.reset_calls()
+            repeat_execute_times.append(run_command(adsk, entry, design, occurrence, previews)[1])
+            repeat_api_calls.append(sum(adsk.calls.values()))
+
+        results.append({
+            'occurrences': size,
+            'instances': min(instances, size),
+            'preview_ms': sum(preview_times) / len(preview_times) * 1000 if preview_times else 0.0,
+            'preview_max_ms': max(preview_times) * 1000 if preview_times else 0.0,
+            'full_previews': full_previews,
+            'execute_ms': execute_time * 1000,
+            'api_calls': sum(api_calls.values()),
+            'computes': api_calls.get('Design.compute', 0),
+            'move_features': api_calls.get('MoveFeatures.add', 0),
+            'memory_peak_kb': memory_peak / 1024,
+            'repeat_execute_ms': sum(repeat_execute_times) / len(repeat_execute_times) * 1000 if repeat_execute_times else 0.0,
+            'repeat_api_calls': sum(repeat_api_calls) // len(repeat_api_calls) if repeat_api_calls else 0,
+            'api_call_counts': api_calls,
+        })
+    return results
+
+
+def print_results(results: list):
+    header = (
+        f"{'occurrences':>12} {'preview ms':>11} {'max ms':>9} {'full':>5} {'execute ms':>11} {'API calls':>10} {'computes':>9} "
+        f"{'peak KB':>10} {'repeat ms':>10} {'repeat calls':>13}"
+    )
+    print(f"startup {startup.get('start_ms', 0.0):.1f} ms, first use {startup.get('first_load_ms', 0.0):.1f} ms")
+    print(header)
+    print('-' * len(header))
+    for result in results:
+        print(
+            f"{result['occurrences']:>12} {result['preview_ms']:>11.3f} {result['preview_max_ms']:>9.3f} "
+            f"{result['full_previews']:>5} "
+            f"{result['execute_ms']:>11.3f} {result['api_calls']:>10} {result['computes']:>9} "
+            f"{result['memory_peak_kb']:>10.1f} {result['repeat_execute_ms']:>10.3f} {result['repeat_api_calls']:>13}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Occurrence counts to benchmark.')
+    parser.add_argument('--instances', type=int, default=100, help='Occurrences per component.')
+    parser.add_argument('--previews', type=int, default=20, help='Preview events per command session.')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds per simulated API call.')
+    parser.add_argument('--compute-latency', type=float, default=0.0, help='Seconds per simulated design compute.')
+    parser.add_argument('--sessions', type=int, default=2, help='Command sessions per assembly, the first one builds the caches.')
+    parser.add_argument('--json', help='Also write the results to this file.')
+    options = parser.parse_args(argv)
+
+    results = benchmark(options.sizes, options.instances, options.previews, options.latency, options.compute_latency, options.sessions)
+    print_results(results)
+
+    if options.json:
+        with open(options.json, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
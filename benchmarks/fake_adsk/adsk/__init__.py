@@ -0,0 +1,51 @@
+# Simulated subset of the Fusion API used to run the add-in outside Fusion.
+#
+# Every simulated API call is counted and can be given a latency, see
+# set_latency, so the cost of the add-in's hot paths can be measured offline.
+
+import time
+
+# Seconds spent in every simulated API call.
+_latency = 0.0
+
+# Extra seconds spent when a change triggers a design compute.
+_compute_latency = 0.0
+
+calls = {}
+
+
+def set_latency(call: float = 0.0, compute: float = 0.0):
+    """Sets the simulated cost of an API call and of a design compute."""
+    global _latency, _compute_latency
+    _latency = call
+    _compute_latency = compute
+
+
+def reset_calls():
+    calls.clear()
+
+
+def api_call(name: str, latency: float = None):
+    calls[name] = calls.get(name, 0) + 1
+    _busy_wait(_latency if latency is None else latency)
+
+
+def compute():
+    api_call('Design.compute', _compute_latency)
+
+
+def doEvents():
+    # Like Fusion's message loop, delivers the custom events fired from other
+    # threads on the calling thread.
+    from .core import Application
+    Application.get()._deliver_custom_events()
+    return True
+
+
+def _busy_wait(seconds: float):
+    # sleep() is far too coarse for microsecond latencies.
+    if seconds <= 0.0:
+        return
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
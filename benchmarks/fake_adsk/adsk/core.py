@@ -0,0 +1,739 @@
+# Simulated adsk.core. Only what the add-in uses is implemented.
+
+import math
+import queue
+
+from . import api_call
+
+
+def _mul(a, b):
+    return [
+        sum(a[r * 4 + k] * b[k * 4 + c] for k in range(4))
+        for r in range(4)
+        for c in range(4)
+    ]
+
+
+def _apply(m, xyz, w):
+    x, y, z = xyz
+    return tuple(m[r * 4] * x + m[r * 4 + 1] * y + m[r * 4 + 2] * z + m[r * 4 + 3] * w for r in range(3))
+
+
+class _Base:
+    @classmethod
+    def cast(cls, obj):
+        return obj if isinstance(obj, cls) else None
+
+
+# Base class of every API object, like adsk.core.Base.
+Base = _Base
+
+
+class _List(_Base):
+    def __init__(self, items=None):
+        self._items = list(items or [])
+
+    @property
+    def count(self):
+        api_call(f'{type(self).__name__}.count')
+        return len(self._items)
+
+    def item(self, index):
+        api_call(f'{type(self).__name__}.item')
+        return self._items[index]
+
+    def __iter__(self):
+        api_call(f'{type(self).__name__}.iterate')
+        return iter(list(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+
+# Enumerations ***************************************************************
+
+class LogLevels:
+    InfoLogLevel = 0
+    WarningLogLevel = 1
+    ErrorLogLevel = 2
+
+
+class LogTypes:
+    ConsoleLogType = 0
+    FileLogType = 1
+
+
+class SurfaceTypes:
+    PlaneSurfaceType = 0
+    CylinderSurfaceType = 1
+    ConeSurfaceType = 2
+    SphereSurfaceType = 3
+    TorusSurfaceType = 4
+    EllipticalCylinderSurfaceType = 5
+    EllipticalConeSurfaceType = 6
+    NurbsSurfaceType = 7
+
+
+# Geometry *******************************************************************
+
+class CommandTerminationReason:
+    UnknownTerminationReason = 0
+    CompletedTerminationReason = 1
+    CancelledTerminationReason = 2
+    AbortedTerminationReason = 3
+    PreEmptedTerminationReason = 4
+    SessionEndingTerminationReason = 5
+
+
+class Point3D(_Base):
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x, self.y, self.z = float(x), float(y), float(z)
+
+    @staticmethod
+    def create(x=0.0, y=0.0, z=0.0):
+        api_call('Point3D.create')
+        return Point3D(x, y, z)
+
+    def asArray(self):
+        api_call('Point3D.asArray')
+        return [self.x, self.y, self.z]
+
+    def copy(self):
+        return Point3D(self.x, self.y, self.z)
+
+    def vectorTo(self, other):
+        api_call('Point3D.vectorTo')
+        return Vector3D(other.x - self.x, other.y - self.y, other.z - self.z)
+
+    def transformBy(self, matrix):
+        api_call('Point3D.transformBy')
+        self.x, self.y, self.z = _apply(matrix._m, (self.x, self.y, self.z), 1.0)
+        return True
+
+
+class BoundingBox3D(_Base):
+    def __init__(self, minPoint, maxPoint):
+        self.minPoint = minPoint
+        self.maxPoint = maxPoint
+
+
+class Vector3D(_Base):
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x, self.y, self.z = float(x), float(y), float(z)
+
+    @staticmethod
+    def create(x=0.0, y=0.0, z=0.0):
+        api_call('Vector3D.create')
+        return Vector3D(x, y, z)
+
+    @property
+    def length(self):
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def asArray(self):
+        api_call('Vector3D.asArray')
+        return [self.x, self.y, self.z]
+
+    def copy(self):
+        return Vector3D(self.x, self.y, self.z)
+
+    def transformBy(self, matrix):
+        api_call('Vector3D.transformBy')
+        self.x, self.y, self.z = _apply(matrix._m, (self.x, self.y, self.z), 0.0)
+        return True
+
+
+class Matrix3D(_Base):
+    def __init__(self, values=None):
+        self._m = list(values) if values else [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+
+    @staticmethod
+    def create():
+        api_call('Matrix3D.create')
+        return Matrix3D()
+
+    def copy(self):
+        api_call('Matrix3D.copy')
+        return Matrix3D(self._m)
+
+    def asArray(self):
+        api_call('Matrix3D.asArray')
+        return list(self._m)
+
+    def setWithArray(self, values):
+        api_call('Matrix3D.setWithArray')
+        self._m = [float(value) for value in values]
+        return True
+
+    def transformBy(self, matrix):
+        api_call('Matrix3D.transformBy')
+        self._m = _mul(matrix._m, self._m)
+        return True
+
+    def invert(self):
+        # Rigid transforms only, which is all the add-in creates.
+        api_call('Matrix3D.invert')
+        m = self._m
+        t = (m[3], m[7], m[11])
+        self._m = [
+            m[0], m[4], m[8], -(m[0] * t[0] + m[4] * t[1] + m[8] * t[2]),
+            m[1], m[5], m[9], -(m[1] * t[0] + m[5] * t[1] + m[9] * t[2]),
+            m[2], m[6], m[10], -(m[2] * t[0] + m[6] * t[1] + m[10] * t[2]),
+            0.0, 0.0, 0.0, 1.0,
+        ]
+        return True
+
+    def isEqualTo(self, matrix):
+        api_call('Matrix3D.isEqualTo')
+        return all(abs(a - b) < 1e-10 for a, b in zip(self._m, matrix._m))
+
+    @property
+    def translation(self):
+        api_call('Matrix3D.translation')
+        return Vector3D(self._m[3], self._m[7], self._m[11])
+
+    @translation.setter
+    def translation(self, vector):
+        api_call('Matrix3D.translation')
+        self._m[3], self._m[7], self._m[11] = vector.x, vector.y, vector.z
+
+    def setToRotateTo(self, from_vector, to_vector, axis=None):
+        api_call('Matrix3D.setToRotateTo')
+        f = _normalize((from_vector.x, from_vector.y, from_vector.z))
+        t = _normalize((to_vector.x, to_vector.y, to_vector.z))
+        a = (f[1] * t[2] - f[2] * t[1], f[2] * t[0] - f[0] * t[2], f[0] * t[1] - f[1] * t[0])
+        s = math.sqrt(sum(v * v for v in a))
+        c = sum(x * y for x, y in zip(f, t))
+        if s < 1e-12:
+            a, s = ((1.0, 0.0, 0.0) if abs(f[0]) < 0.9 else (0.0, 1.0, 0.0)), 0.0
+            a = _normalize((f[1] * a[2] - f[2] * a[1], f[2] * a[0] - f[0] * a[2], f[0] * a[1] - f[1] * a[0]))
+            c = 1.0 if c > 0.0 else -1.0
+        else:
+            a = tuple(v / s for v in a)
+        x, y, z = a
+        k = 1.0 - c
+        self._m = [
+            k * x * x + c, k * x * y - s * z, k * x * z + s * y, 0.0,
+            k * x * y + s * z, k * y * y + c, k * y * z - s * x, 0.0,
+            k * x * z - s * y, k * y * z + s * x, k * z * z + c, 0.0,
+            0.0, 0.0, 0.0, 1.0,
+        ]
+        return True
+
+
+def _normalize(v):
+    length = math.sqrt(sum(c * c for c in v))
+    return tuple(c / length for c in v)
+
+
+class ObjectCollection(_List):
+    @staticmethod
+    def create():
+        api_call('ObjectCollection.create')
+        return ObjectCollection()
+
+    def add(self, item):
+        api_call('ObjectCollection.add')
+        self._items.append(item)
+        return True
+
+
+# Events *********************************************************************
+
+class Event(_Base):
+    def __init__(self, name=''):
+        self.name = name
+        self._handlers = []
+
+    def remove(self, handler):
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+            return True
+        return False
+
+    def fire(self, args):
+        for handler in list(self._handlers):
+            handler.notify(args)
+
+
+class EventArgs(_Base):
+    def __init__(self, firingEvent=None):
+        self.firingEvent = firingEvent
+
+
+class CommandCreatedEventHandler:
+    def notify(self, args):
+        pass
+
+
+class CommandEventHandler:
+    def notify(self, args):
+        pass
+
+
+class InputChangedEventHandler:
+    def notify(self, args):
+        pass
+
+
+class ValidateInputsEventHandler:
+    def notify(self, args):
+        pass
+
+
+class DocumentEventHandler:
+    def notify(self, args):
+        pass
+
+
+class CustomEventHandler:
+    def notify(self, args):
+        pass
+
+
+class ApplicationCommandEventHandler:
+    def notify(self, args):
+        pass
+
+
+# The handler type is read from the annotation of add(), like the real API.
+class CommandCreatedEvent(Event):
+    def add(self, handler: 'CommandCreatedEventHandler'):
+        self._handlers.append(handler)
+        return True
+
+
+class CommandEvent(Event):
+    def add(self, handler: 'CommandEventHandler'):
+        self._handlers.append(handler)
+        return True
+
+
+class InputChangedEvent(Event):
+    def add(self, handler: 'InputChangedEventHandler'):
+        self._handlers.append(handler)
+        return True
+
+
+class ValidateInputsEvent(Event):
+    def add(self, handler: 'ValidateInputsEventHandler'):
+        self._handlers.append(handler)
+        return True
+
+
+class DocumentEvent(Event):
+    def add(self, handler: 'DocumentEventHandler'):
+        self._handlers.append(handler)
+        return True
+
+
+class CustomEvent(Event):
+    def add(self, handler: 'CustomEventHandler'):
+        self._handlers.append(handler)
+        return True
+
+
+class ApplicationCommandEvent(Event):
+    def add(self, handler: 'ApplicationCommandEventHandler'):
+        self._handlers.append(handler)
+        return True
+
+
+class CommandCreatedEventArgs(EventArgs):
+    def __init__(self, command):
+        super().__init__()
+        self.command = command
+
+
+class CommandEventArgs(EventArgs):
+    def __init__(self, command):
+        super().__init__()
+        self.command = command
+        self.isValidResult = False
+
+
+class InputChangedEventArgs(EventArgs):
+    def __init__(self, input, inputs):
+        super().__init__()
+        self.input = input
+        self.inputs = inputs
+
+
+class ValidateInputsEventArgs(EventArgs):
+    def __init__(self, inputs):
+        super().__init__()
+        self.inputs = inputs
+        self.areInputsValid = True
+
+
+class DocumentEventArgs(EventArgs):
+    def __init__(self, document=None):
+        super().__init__()
+        self.document = document
+
+
+class ApplicationCommandEventArgs(EventArgs):
+    def __init__(self, commandId='', terminationReason=CommandTerminationReason.CompletedTerminationReason):
+        super().__init__()
+        self.commandId = commandId
+        self.terminationReason = terminationReason
+
+
+class CustomEventArgs(EventArgs):
+    def __init__(self, additionalInfo=''):
+        super().__init__()
+        self.additionalInfo = additionalInfo
+
+
+# Command inputs *************************************************************
+
+class CommandInput(_Base):
+    def __init__(self, id, name=''):
+        self.id = id
+        self.name = name
+        self.tooltip = ''
+        self.isVisible = True
+        self.isEnabled = True
+        self.isFullWidth = False
+
+
+class Selection(_Base):
+    def __init__(self, entity):
+        self.entity = entity
+
+
+class SelectionCommandInput(CommandInput):
+    def __init__(self, id, name=''):
+        super().__init__(id, name)
+        self._selections = []
+        self.filters = []
+        self.limits = (1, 1)
+
+    def addSelectionFilter(self, name):
+        self.filters.append(name)
+        return True
+
+    def setSelectionLimits(self, minimum, maximum=0):
+        self.limits = (minimum, maximum)
+        return True
+
+    @property
+    def selectionCount(self):
+        api_call('SelectionCommandInput.selectionCount')
+        return len(self._selections)
+
+    def selection(self, index):
+        api_call('SelectionCommandInput.selection')
+        return Selection(self._selections[index])
+
+    def addSelection(self, entity):
+        api_call('SelectionCommandInput.addSelection')
+        self._selections.append(entity)
+        return True
+
+    def clearSelection(self):
+        self._selections = []
+        return True
+
+
+class TriadCommandInput(CommandInput):
+    def __init__(self, id, transform):
+        super().__init__(id)
+        self._transform = Matrix3D(transform._m)
+        self.isZRotationVisible = True
+
+    @property
+    def transform(self):
+        api_call('TriadCommandInput.transform')
+        return Matrix3D(self._transform._m)
+
+    @transform.setter
+    def transform(self, matrix):
+        self._transform = Matrix3D(matrix._m)
+
+    def hideAll(self):
+        self.isZRotationVisible = False
+        return True
+
+
+class TextBoxCommandInput(CommandInput):
+    def __init__(self, id, name='', text=''):
+        super().__init__(id, name)
+        self.text = text
+
+
+class BoolValueCommandInput(CommandInput):
+    def __init__(self, id, name='', isCheckBox=True, value=False):
+        super().__init__(id, name)
+        self.isCheckBox = isCheckBox
+        self.value = value
+
+
+class CommandInputs(_List):
+    def _add(self, command_input):
+        self._items.append(command_input)
+        return command_input
+
+    def itemById(self, id):
+        api_call('CommandInputs.itemById')
+        for command_input in self._items:
+            if command_input.id == id:
+                return command_input
+        return None
+
+    def addSelectionInput(self, id, name, commandPrompt):
+        return self._add(SelectionCommandInput(id, name))
+
+    def addTriadCommandInput(self, id, transform):
+        return self._add(TriadCommandInput(id, transform))
+
+    def addTextBoxCommandInput(self, id, name, formattedText, numRows, isReadOnly):
+        return self._add(TextBoxCommandInput(id, name, formattedText))
+
+    def addBoolValueInput(self, id, name, isCheckBox, resourceFolder='', initialValue=False):
+        return self._add(BoolValueCommandInput(id, name, isCheckBox, initialValue))
+
+
+class Command(_Base):
+    def __init__(self):
+        self.commandInputs = CommandInputs()
+        self.execute = CommandEvent('OnExecute')
+        self.executePreview = CommandEvent('OnExecutePreview')
+        self.destroy = CommandEvent('OnDestroy')
+        self.inputChanged = InputChangedEvent('OnInputChanged')
+        self.validateInputs = ValidateInputsEvent('OnValidateInputs')
+        self.isOKButtonVisible = True
+        self.doExecute = None
+
+    def doExecutePreview(self):
+        api_call('Command.doExecutePreview')
+        self.executePreview.fire(CommandEventArgs(self))
+        return True
+
+
+# User interface *************************************************************
+
+class CommandDefinition(_Base):
+    def __init__(self, definitions, id, name, tooltip, resourceFolder):
+        self._definitions = definitions
+        self.id = id
+        self.name = name
+        self.tooltip = tooltip
+        self.resourceFolder = resourceFolder
+        self.commandCreated = CommandCreatedEvent('OnCommandCreated')
+
+    def execute(self):
+        # Creates a command and fires commandCreated, returns the command so a
+        # caller can drive its events.
+        command = Command()
+        self.commandCreated.fire(CommandCreatedEventArgs(command))
+        return command
+
+    def deleteMe(self):
+        self._definitions._items.remove(self)
+        return True
+
+
+class CommandDefinitions(_List):
+    def addButtonDefinition(self, id, name, tooltip, resourceFolder=''):
+        api_call('CommandDefinitions.addButtonDefinition')
+        definition = CommandDefinition(self, id, name, tooltip, resourceFolder)
+        self._items.append(definition)
+        return definition
+
+    def itemById(self, id):
+        for definition in self._items:
+            if definition.id == id:
+                return definition
+        return None
+
+
+class CommandControl(_Base):
+    def __init__(self, controls, commandDefinition):
+        self._controls = controls
+        self.commandDefinition = commandDefinition
+        self.id = commandDefinition.id
+        self.isPromoted = False
+
+    def deleteMe(self):
+        self._controls._items.remove(self)
+        return True
+
+
+class ToolbarControls(_List):
+    def addCommand(self, commandDefinition, positionID='', isBefore=True):
+        control = CommandControl(self, commandDefinition)
+        self._items.append(control)
+        return control
+
+    def itemById(self, id):
+        for control in self._items:
+            if control.id == id:
+                return control
+        return None
+
+
+class ToolbarPanel(_Base):
+    def __init__(self, id):
+        self.id = id
+        self.controls = ToolbarControls()
+
+
+class ToolbarPanels(_List):
+    def itemById(self, id):
+        for panel in self._items:
+            if panel.id == id:
+                return panel
+        panel = ToolbarPanel(id)
+        self._items.append(panel)
+        return panel
+
+
+class Workspace(_Base):
+    def __init__(self, id):
+        self.id = id
+        self.toolbarPanels = ToolbarPanels()
+
+
+class Workspaces(_List):
+    def itemById(self, id):
+        for workspace in self._items:
+            if workspace.id == id:
+                return workspace
+        workspace = Workspace(id)
+        self._items.append(workspace)
+        return workspace
+
+
+class ProgressBar(_Base):
+    def __init__(self):
+        self.isVisible = False
+        self.progressValue = 0
+
+    def show(self, message, minimumValue=0, maximumValue=100, isImmediate=False):
+        self.isVisible = True
+        return True
+
+    def hide(self):
+        self.isVisible = False
+        return True
+
+
+class DialogResults:
+    DialogError = -1
+    DialogOK = 0
+    DialogCancel = 1
+    DialogYes = 2
+    DialogNo = 3
+
+
+class FileDialog(_Base):
+    # Answers with the file name queued in UserInterface.file_dialog_answers, or
+    # is cancelled when there is none.
+    def __init__(self, ui):
+        self._ui = ui
+        self.title = ''
+        self.filter = ''
+        self.filename = ''
+
+    def showOpen(self):
+        return self._answer()
+
+    def showSave(self):
+        return self._answer()
+
+    def _answer(self):
+        if not self._ui.file_dialog_answers:
+            return DialogResults.DialogCancel
+        self.filename = self._ui.file_dialog_answers.pop(0)
+        return DialogResults.DialogOK
+
+
+class Products(_List):
+    def itemByProductType(self, productType):
+        for product in self._items:
+            if getattr(product, 'productType', None) == productType:
+                return product
+        return None
+
+
+class Document(_Base):
+    def __init__(self, name, products=()):
+        self.name = name
+        self.products = Products(products)
+        self.isValid = True
+
+    def save(self, description=''):
+        api_call('Document.save')
+        return True
+
+    def close(self, saveChanges=True):
+        api_call('Document.close')
+        self.products = Products()
+        self.isValid = False
+        return True
+
+
+class UserInterface(_Base):
+    def __init__(self):
+        self.commandDefinitions = CommandDefinitions()
+        self.workspaces = Workspaces()
+        self.progressBar = ProgressBar()
+        self.commandTerminated = ApplicationCommandEvent('OnCommandTerminated')
+        self.messages = []
+        self.file_dialog_answers = []
+
+    def createFileDialog(self):
+        return FileDialog(self)
+
+    def messageBox(self, text, title='', buttons=0, icon=0):
+        self.messages.append(text)
+        return 0
+
+
+class Application(_Base):
+    _instance = None
+
+    def __init__(self):
+        self.userInterface = UserInterface()
+        self.activeProduct = None
+        self.activeDocument = None
+        self.documents = _List()
+        self.documentActivated = DocumentEvent('OnDocumentActivated')
+        self.documentOpened = DocumentEvent('OnDocumentOpened')
+        self.documentClosed = DocumentEvent('OnDocumentClosed')
+        self.logged = []
+        self._custom_events = {}
+        self._fired_custom_events = queue.Queue()
+
+    @staticmethod
+    def get():
+        if Application._instance is None:
+            Application._instance = Application()
+        return Application._instance
+
+    def log(self, message, level=LogLevels.InfoLogLevel, type=LogTypes.ConsoleLogType):
+        self.logged.append(message)
+
+    def registerCustomEvent(self, eventId):
+        event = self._custom_events.get(eventId)
+        if event is None:
+            event = self._custom_events[eventId] = CustomEvent(eventId)
+        return event
+
+    def unregisterCustomEvent(self, eventId):
+        return self._custom_events.pop(eventId, None) is not None
+
+    def fireCustomEvent(self, eventId, additionalInfo=''):
+        # Safe from any thread, the event is delivered by adsk.doEvents.
+        if eventId not in self._custom_events:
+            return False
+        self._fired_custom_events.put((eventId, additionalInfo))
+        return True
+
+    def _deliver_custom_events(self):
+        while not self._fired_custom_events.empty():
+            eventId, additionalInfo = self._fired_custom_events.get()
+            event = self._custom_events.get(eventId)
+            if event is not None:
+                event.fire(CustomEventArgs(additionalInfo))
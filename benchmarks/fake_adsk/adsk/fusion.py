@@ -0,0 +1,500 @@
+# Simulated adsk.fusion. Models a flat assembly of box shaped single body
+# components, which is enough to drive the reorient pipeline.
+
+import itertools
+
+from . import api_call, compute
+from .core import _Base, _List, _apply, _mul, BoundingBox3D, Matrix3D, Point3D, Vector3D, SurfaceTypes
+
+_tokens = itertools.count(1)
+
+
+class CalculationAccuracy:
+    LowCalculationAccuracy = 0
+    MediumCalculationAccuracy = 1
+    HighCalculationAccuracy = 2
+    VeryHighCalculationAccuracy = 3
+
+
+class DesignTypes:
+    DirectDesignType = 0
+    ParametricDesignType = 1
+
+
+class OccurrenceList(_List):
+    pass
+
+
+class BRepBodies(_List):
+    pass
+
+
+class BRepFaces(_List):
+    pass
+
+
+class BRepVertices(_List):
+    pass
+
+
+class Plane(_Base):
+    surfaceType = SurfaceTypes.PlaneSurfaceType
+
+
+class SurfaceEvaluator(_Base):
+    def __init__(self, face):
+        self._face = face
+
+    def getNormalAtPoint(self, point):
+        api_call('SurfaceEvaluator.getNormalAtPoint')
+        return True, Vector3D(*self._face._world(self._face._normal, 0.0))
+
+
+class PhysicalProperties(_Base):
+    def __init__(self, center_of_mass):
+        self.centerOfMass = center_of_mass
+
+
+class _Entity(_Base):
+    # Shared proxy handling. Native entities have no assembly context.
+
+    def __init__(self, native=None, context=None):
+        self._native = native
+        self._context = context
+
+    @property
+    def nativeObject(self):
+        api_call(f'{type(self).__name__}.nativeObject')
+        return self._native
+
+    @property
+    def assemblyContext(self):
+        api_call(f'{type(self).__name__}.assemblyContext')
+        return self._context
+
+    @property
+    def entityToken(self):
+        api_call(f'{type(self).__name__}.entityToken')
+        native = self._native or self
+        return native._token if self._context is None else f'{native._token}@{self._context._token}'
+
+    def _key(self):
+        return (id(self._native or self), id(self._context))
+
+    def __eq__(self, other):
+        api_call(f'{type(self).__name__}.equals')
+        return isinstance(other, _Entity) and self._key() == other._key()
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = object.__hash__
+
+    def _matrix(self):
+        # Component space to world space, including the body moves.
+        native = self._native or self
+        body = native if isinstance(native, BRepBody) else native._body
+        matrix = body._placement
+        if self._context is not None:
+            matrix = _mul(self._context._transform._m, matrix)
+        return matrix
+
+    def _world(self, xyz, w):
+        return _apply(self._matrix(), xyz, w)
+
+    def createForAssemblyContext(self, occurrence):
+        api_call(f'{type(self).__name__}.createForAssemblyContext')
+        return type(self)._proxy(self._native or self, occurrence)
+
+
+class BRepVertex(_Entity):
+    def __init__(self, body, point, native=None, context=None):
+        super().__init__(native, context)
+        self._body = body
+        self._point = point
+
+    @property
+    def geometry(self):
+        api_call('BRepVertex.geometry')
+        return Point3D(*self._world(self._point, 1.0))
+
+
+class BRepFace(_Entity):
+    def __init__(self, body, center, normal, area, native=None, context=None):
+        super().__init__(native, context)
+        self._body = body
+        self._center = center
+        self._normal = normal
+        self._area = area
+        self._token = f'face{next(_tokens)}'
+
+    @staticmethod
+    def _proxy(native, occurrence):
+        return BRepFace(native._body._proxy(native._body, occurrence), native._center, native._normal, native._area, native, occurrence)
+
+    @property
+    def body(self):
+        api_call('BRepFace.body')
+        return self._body
+
+    @property
+    def centroid(self):
+        api_call('BRepFace.centroid')
+        return Point3D(*self._world(self._center, 1.0))
+
+    @property
+    def evaluator(self):
+        api_call('BRepFace.evaluator')
+        return SurfaceEvaluator(self)
+
+    @property
+    def area(self):
+        api_call('BRepFace.area')
+        return self._area
+
+    @property
+    def geometry(self):
+        api_call('BRepFace.geometry')
+        return Plane()
+
+
+class BRepBody(_Entity):
+    def __init__(self, component, size=(2.0, 1.0, 0.5), native=None, context=None):
+        super().__init__(native, context)
+        self._component = component
+        self._token = f'body{next(_tokens)}'
+        if native is not None:
+            return
+
+        # Box centered on the origin, the placement collects the body moves.
+        self._size = size
+        self._placement = [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+        sx, sy, sz = (s / 2.0 for s in size)
+        self._faces = [
+            BRepFace(self, (0.0, 0.0, sz), (0.0, 0.0, 1.0), size[0] * size[1]),
+            BRepFace(self, (0.0, 0.0, -sz), (0.0, 0.0, -1.0), size[0] * size[1]),
+            BRepFace(self, (sx, 0.0, 0.0), (1.0, 0.0, 0.0), size[1] * size[2]),
+            BRepFace(self, (-sx, 0.0, 0.0), (-1.0, 0.0, 0.0), size[1] * size[2]),
+            BRepFace(self, (0.0, sy, 0.0), (0.0, 1.0, 0.0), size[0] * size[2]),
+            BRepFace(self, (0.0, -sy, 0.0), (0.0, -1.0, 0.0), size[0] * size[2]),
+        ]
+        self._vertices = [BRepVertex(self, (x, y, z)) for x in (-sx, sx) for y in (-sy, sy) for z in (-sz, sz)]
+
+    @staticmethod
+    def _proxy(native, occurrence):
+        return BRepBody(native._component, native=native, context=occurrence)
+
+    @property
+    def parentComponent(self):
+        api_call('BRepBody.parentComponent')
+        return self._component
+
+    @property
+    def faces(self):
+        api_call('BRepBody.faces')
+        native = self._native or self
+        if self._context is None:
+            return BRepFaces(native._faces)
+        return BRepFaces(BRepFace._proxy(face, self._context) for face in native._faces)
+
+    @property
+    def vertices(self):
+        api_call('BRepBody.vertices')
+        native = self._native or self
+        if self._context is None:
+            return BRepVertices(native._vertices)
+        return BRepVertices(BRepVertex(self, vertex._point, vertex, self._context) for vertex in native._vertices)
+
+    @property
+    def area(self):
+        api_call('BRepBody.area')
+        return sum(face._area for face in (self._native or self)._faces)
+
+    @property
+    def volume(self):
+        api_call('BRepBody.volume')
+        x, y, z = (self._native or self)._size
+        return x * y * z
+
+    @property
+    def boundingBox(self):
+        api_call('BRepBody.boundingBox')
+        native = self._native or self
+        corners = [self._world(vertex._point, 1.0) for vertex in native._vertices]
+        return BoundingBox3D(Point3D(*map(min, zip(*corners))), Point3D(*map(max, zip(*corners))))
+
+    def getPhysicalProperties(self, accuracy=CalculationAccuracy.LowCalculationAccuracy):
+        api_call('BRepBody.getPhysicalProperties')
+        return PhysicalProperties(Point3D(*self._world((0.0, 0.0, 0.0), 1.0)))
+
+
+class MoveFeatureInput(_Base):
+    def __init__(self, entities):
+        self.inputEntities = entities
+        self.transform = None
+
+    def defineAsFreeMove(self, transform):
+        api_call('MoveFeatureInput.defineAsFreeMove')
+        self.transform = Matrix3D(transform._m)
+        return True
+
+
+class MoveFeature(_Base):
+    def __init__(self, features, move_input, moved):
+        self._features = features
+        self._moved = moved
+        self.transform = move_input.transform
+
+    def deleteMe(self):
+        # Deleting the feature puts the bodies back.
+        api_call('MoveFeature.deleteMe')
+        for native, placement in self._moved:
+            native._placement = placement
+        self._features._items.remove(self)
+        self._features._design._changed()
+        return True
+
+
+class MoveFeatures(_List):
+    def __init__(self, design):
+        super().__init__()
+        self._design = design
+
+    def createInput2(self, inputEntities):
+        api_call('MoveFeatures.createInput2')
+        return MoveFeatureInput(inputEntities)
+
+    def add(self, input):
+        # The transform is in world space. Move the native body by the transform
+        # expressed in its component space.
+        api_call('MoveFeatures.add')
+        moved = []
+        for body in input.inputEntities:
+            native = body._native or body
+            if body._context is not None:
+                occurrence = Matrix3D(body._context._transform._m)
+                inverse = occurrence.copy()
+                inverse.invert()
+                move = _mul(inverse._m, _mul(input.transform._m, occurrence._m))
+            else:
+                move = input.transform._m
+            self._design._record(lambda native=native, old=native._placement: setattr(native, '_placement', old))
+            moved.append((native, native._placement))
+            native._placement = _mul(move, native._placement)
+        feature = MoveFeature(self, input, moved)
+        self._items.append(feature)
+        self._design._record(lambda: self._items.remove(feature))
+        self._design._changed()
+        return feature
+
+
+class Features(_Base):
+    def __init__(self, design):
+        self.moveFeatures = MoveFeatures(design)
+
+
+class Occurrence(_Base):
+    def __init__(self, design, component, parent_component, transform=None):
+        self._design = design
+        self._component = component
+        self._parent = parent_component
+        self._transform = Matrix3D(transform._m if transform else None)
+        self._token = f'occ{next(_tokens)}'
+        self.name = f'{component.name}:{len(component._occurrences) + 1}'
+        self.isGrounded = False
+        self.isGroundToParent = False
+        self.isIsolated = False
+        self.isLightBulbOn = True
+        self.assemblyContext = None
+
+    @property
+    def component(self):
+        api_call('Occurrence.component')
+        return self._component
+
+    @property
+    def transform2(self):
+        api_call('Occurrence.transform2')
+        return Matrix3D(self._transform._m)
+
+    @transform2.setter
+    def transform2(self, matrix):
+        api_call('Occurrence.transform2')
+        self._design._record(lambda old=self._transform: setattr(self, '_transform', old))
+        self._transform = Matrix3D(matrix._m)
+        self._design._changed()
+
+    @property
+    def bRepBodies(self):
+        api_call('Occurrence.bRepBodies')
+        return BRepBodies(BRepBody._proxy(body, self) for body in self._component._bodies)
+
+    @property
+    def fullPathName(self):
+        api_call('Occurrence.fullPathName')
+        return self.name
+
+    @property
+    def entityToken(self):
+        api_call('Occurrence.entityToken')
+        return self._token
+
+    def __eq__(self, other):
+        api_call('Occurrence.equals')
+        return self is other
+
+    __hash__ = object.__hash__
+
+
+class CustomGraphicsCoordinates(_Base):
+    def __init__(self, coordinates):
+        self.coordinates = list(coordinates)
+
+    @staticmethod
+    def create(coordinates):
+        api_call('CustomGraphicsCoordinates.create')
+        return CustomGraphicsCoordinates(coordinates)
+
+
+class CustomGraphicsLines(_Base):
+    def __init__(self, coordinates, indexList, isLineStrip):
+        self.coordinates = coordinates
+        self.indexList = list(indexList)
+        self.isLineStrip = isLineStrip
+
+
+class CustomGraphicsGroup(_Base):
+    def __init__(self, groups):
+        self._groups = groups
+        self.isValid = True
+        self.lines = []
+
+    def addLines(self, coordinates, indexList, isLineStrip, lineStripLengths=None):
+        api_call('CustomGraphicsGroup.addLines')
+        lines = CustomGraphicsLines(coordinates, indexList, isLineStrip)
+        self.lines.append(lines)
+        return lines
+
+    def deleteMe(self):
+        api_call('CustomGraphicsGroup.deleteMe')
+        self._groups._items.remove(self)
+        self.isValid = False
+        return True
+
+
+class CustomGraphicsGroups(_List):
+    def add(self):
+        api_call('CustomGraphicsGroups.add')
+        group = CustomGraphicsGroup(self)
+        self._items.append(group)
+        return group
+
+
+class Component(_Base):
+    def __init__(self, design, name):
+        self._design = design
+        self.name = name
+        self.id = f'component{next(_tokens)}'
+        self._bodies = []
+        self._children = []
+        self._occurrences = []
+        self.features = Features(design)
+        self.customGraphicsGroups = CustomGraphicsGroups()
+        self.isOriginFolderLightBulbOn = False
+
+    @property
+    def parentDesign(self):
+        return self._design
+
+    @property
+    def entityToken(self):
+        return self.id
+
+    @property
+    def bRepBodies(self):
+        api_call('Component.bRepBodies')
+        return BRepBodies(self._bodies)
+
+    @property
+    def occurrences(self):
+        api_call('Component.occurrences')
+        return OccurrenceList(self._children)
+
+    @property
+    def allOccurrences(self):
+        api_call('Component.allOccurrences')
+        return OccurrenceList(self._children)
+
+    def allOccurrencesByComponent(self, component):
+        # Fusion walks the whole tree, so this scans every occurrence.
+        api_call('Component.allOccurrencesByComponent')
+        return OccurrenceList(occurrence for occurrence in self._children if occurrence._component is component)
+
+    def __eq__(self, other):
+        api_call('Component.equals')
+        return self is other
+
+    __hash__ = object.__hash__
+
+
+class Design(_Base):
+    def __init__(self, name='Design'):
+        self.name = name
+        self.designType = DesignTypes.ParametricDesignType
+        self.productType = 'DesignProductType'
+        self._deferred = False
+        self._pending = False
+        self._undo = None
+        self._components = []
+        self.rootComponent = Component(self, 'root')
+        self._components.append(self.rootComponent)
+
+    @property
+    def allComponents(self):
+        api_call('Design.allComponents')
+        return _List(self._components)
+
+    @property
+    def isComputeDeferred(self):
+        return self._deferred
+
+    @isComputeDeferred.setter
+    def isComputeDeferred(self, value):
+        self._deferred = value
+        if not value and self._pending:
+            self._pending = False
+            compute()
+
+    def begin_transaction(self):
+        # Records changes until abort_transaction, used to roll back previews
+        # like Fusion does at the end of executePreview.
+        self._undo = []
+
+    def abort_transaction(self):
+        undo, self._undo = self._undo or [], None
+        for action in reversed(undo):
+            action()
+
+    def _record(self, action):
+        if self._undo is not None:
+            self._undo.append(action)
+
+    def _changed(self):
+        if self._deferred:
+            self._pending = True
+        else:
+            compute()
+
+    # Building synthetic assemblies *****************************************
+
+    def add_component(self, name, size=(2.0, 1.0, 0.5)):
+        component = Component(self, name)
+        component._bodies.append(BRepBody(component, size))
+        self._components.append(component)
+        return component
+
+    def add_occurrence(self, component, transform=None):
+        occurrence = Occurrence(self, component, self.rootComponent, transform)
+        component._occurrences.append(occurrence)
+        self.rootComponent._children.append(occurrence)
+        return occurrence
@@ -1,24 +1,57 @@
 # Here you define the commands that will be added to your add-in.
 
-# TODO Import the modules corresponding to the commands you created.
-# If you want to add an additional command, duplicate one of the existing directories and import it here.
-# You need to use aliases (import "entry" as "my_module") assuming you have the default module named "entry".
-from .reorientComponent import entry as reorientComponent
+import sys
+import time
 
-# TODO add your imported modules to this list.
-# Fusion will automatically call the start() and stop() functions.
-commands = [reorientComponent]
+from ..lib import fusionAddInUtils as futil
+from .lazy_command import LazyCommand
 
+# TODO Add the packages of the commands you created.
+# If you want to add an additional command, duplicate one of the existing
+# directories and add its name here. Only the definition module of each command
+# is imported at startup, the entry module is imported when the command is first
+# used.
+commands = [
+    LazyCommand('reorientComponent'),
+    LazyCommand('batchReorient'),
+    LazyCommand('diagnostics'),
+]
 
-# Assumes you defined a "start" function in each of your modules.
+# Seconds spent in start, per command package.
+startup_times = {}
+
+
+# Creates the button of every command.
 # The start function will be run when the add-in is started.
 def start():
     for command in commands:
+        command_start = time.perf_counter()
         command.start()
+        startup_times[command.package] = time.perf_counter() - command_start
+        futil.record_time(f'startup.{command.package}', startup_times[command.package])
 
 
-# Assumes you defined a "stop" function in each of your modules.
+# Stops every command that was used and removes the buttons.
 # The stop function will be run when the add-in is stopped.
 def stop():
     for command in commands:
         command.stop()
+
+    # The scripting interface starts the pipeline without loading any command.
+    # Only stop it when something loaded it, importing it here would undo the
+    # lazy loading.
+    pipeline = sys.modules.get(f'{__name__}.reorientComponent.pipeline')
+    if pipeline is not None:
+        pipeline.stop()
+
+
+def startup_report() -> str:
+    """Returns the time spent creating each command's button, and loading the
+    commands that were used so far, as text."""
+    lines = [f'{package}: started in {seconds * 1000:.2f} ms' for package, seconds in startup_times.items()]
+    lines.extend(
+        f'{command.package}: loaded in {command.load_time * 1000:.2f} ms'
+        for command in commands
+        if command.load_time is not None
+    )
+    return '\n'.join(lines)
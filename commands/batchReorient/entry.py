@@ -0,0 +1,231 @@
+import adsk.core
+import adsk.fusion
+import os
+from ...lib import fusionAddInUtils as futil
+from ...lib import reorientUtils as rutil
+from ... import config
+from ..reorientComponent import pipeline
+from .definition import CMD_ID, CMD_NAME
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+# global variables *********************************************
+is_valid = False
+
+# plan records loaded with the Replay Plan button, replayed instead of the
+# selected faces
+replay_records = None
+replay_message = ''
+
+# Worker scoring the faces of the selected bodies for Auto Lay Flat, see
+# pipeline.rank_bodies.
+ranking_jobs = futil.BackgroundJobs(f"{config.COMPANY_NAME}_{config.ADDIN_NAME}_rankingJobs")
+
+# Local list of event handlers used to maintain a reference so
+# they are not released and garbage collected.
+local_handlers = []
+
+# Executed when the command is first used. The button itself is created at
+# startup from definition.py, see commands/__init__.py.
+def start():
+    pipeline.start(CMD_ID)
+    ranking_jobs.start()
+
+
+# Executed when add-in is stopped, if the command was used.
+def stop():
+    ranking_jobs.stop()
+    pipeline.stop()
+
+
+# Function that is called when a user clicks the corresponding button in the UI.
+# This defines the contents of the command dialog and connects to the command related events.
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    # General logging for debug.
+    futil.log(f"{CMD_NAME} Command Created Event")
+    futil.begin_session(CMD_NAME, __name__)
+
+    # https://help.autodesk.com/view/fusion360/ENU/?contextId=CommandInputs
+    inputs = args.command.commandInputs
+
+    pipeline.occurrence_index.bind(adsk.fusion.Design.cast(app.activeProduct))
+
+    # selection input for selecting one planar face per component, no upper limit
+    select_faces_input = inputs.addSelectionInput("selectFacesInput", "Select Faces", "Select one face per component")
+    select_faces_input.addSelectionFilter("PlanarFaces")
+    select_faces_input.setSelectionLimits(1, 0)
+
+    # when checked each component is laid on its best planar face instead of the selected one
+    auto_face_input = inputs.addBoolValueInput('autoFaceInput', 'Auto Lay Flat', True, '', False)
+    auto_face_input.tooltip = 'Use the planar face each body rests best on instead of the selected face.'
+
+    # when checked the reorientations are saved to a plan file after they are applied
+    export_plan_input = inputs.addBoolValueInput('exportPlanInput', 'Export Plan', True, '', False)
+    export_plan_input.tooltip = 'Save the reorientations to a plan file that can be replayed on a later revision.'
+
+    # button that loads a plan file to apply instead of the selected faces
+    replay_plan_input = inputs.addBoolValueInput('replayPlanInput', 'Replay Plan', False, '', False)
+    replay_plan_input.tooltip = 'Apply a saved plan file, without evaluating any face.'
+
+    errorTextInput = inputs.addTextBoxCommandInput('errorTextInput', 'Log', '', 3, True)
+    errorTextInput.isFullWidth = True
+
+    futil.add_handler(
+        args.command.execute, command_execute, local_handlers=local_handlers
+    )
+    futil.add_handler(
+        args.command.inputChanged, command_input_changed, local_handlers=local_handlers
+    )
+    futil.add_handler(
+        args.command.validateInputs,
+        command_validate_input,
+        local_handlers=local_handlers,
+    )
+    futil.add_handler(
+        args.command.destroy, command_destroy, local_handlers=local_handlers
+    )
+
+
+# This event handler is called when the user clicks the OK button in the command dialog.
+def command_execute(args: adsk.core.CommandEventArgs):
+    # General logging for debug.
+    futil.log(f"{CMD_NAME} Command Execute Event")
+
+    inputs = args.command.commandInputs
+    design = adsk.fusion.Design.cast(app.activeProduct)
+
+    select_faces_input = adsk.core.SelectionCommandInput.cast(inputs.itemById('selectFacesInput'))
+    auto_face_input = adsk.core.BoolValueCommandInput.cast(inputs.itemById('autoFaceInput'))
+    export_plan_input = adsk.core.BoolValueCommandInput.cast(inputs.itemById('exportPlanInput'))
+
+    # A loaded plan is applied as stored, in one grouped operation.
+    if replay_records:
+        plan = rutil.ExecutionPlan()
+        results = pipeline.plan_replay(plan, design, replay_records)
+        pipeline.execute_plan(design, plan)
+        for name, message in results.items():
+            if message:
+                futil.log(f"{CMD_NAME} skipped {name}: {message}", adsk.core.LogLevels.WarningLogLevel)
+        futil.log(f"{CMD_NAME} replayed {len(plan)} steps for {len(results)} components")
+        return
+
+    # Compute every alignment up front so no geometry is queried while the
+    # design is being modified.
+    faces = get_selected_faces(select_faces_input)
+    if auto_face_input.value:
+        pipeline.rank_bodies([face.body for face in faces], ranking_jobs)
+
+    jobs = []
+    for face in faces:
+        body = face.body
+        if auto_face_input.value:
+            face = pipeline.best_face(body) or face
+        jobs.append((pipeline.occurrence_index.lookup(body), face, pipeline.face_alignment(face)))
+
+    # Describe the reorientations for the plan file before the faces move.
+    records = [pipeline.plan_record(*job) for job in jobs] if export_plan_input.value else None
+
+    # Apply all of them as one grouped operation, rolled back as a whole if any
+    # step fails.
+    plan = rutil.ExecutionPlan()
+    for occurrence, _, body_transform in jobs:
+        pipeline.plan_reorientation(plan, design, occurrence, body_transform)
+    pipeline.execute_plan(design, plan)
+
+    futil.log(f"{CMD_NAME} reoriented {len(jobs)} components")
+
+    if records:
+        plan_path = pipeline.ask_plan_file(save=True)
+        if plan_path:
+            rutil.write_plan(plan_path, records)
+            futil.log(f"{CMD_NAME} saved {len(records)} reorientations to {plan_path}")
+
+
+# This event handler is called when the user changes anything in the command dialog
+# allowing you to modify values of other inputs based on that change.
+def command_input_changed(args: adsk.core.InputChangedEventArgs):
+    changed_input = args.input
+    inputs = args.inputs
+
+    root_comp = adsk.fusion.Design.cast(app.activeProduct).rootComponent
+
+    global is_valid
+
+    # General logging for debug.
+    futil.log("%s Input Changed Event fired from a change to %s", args=(CMD_NAME, changed_input.id))
+
+    select_faces_input = adsk.core.SelectionCommandInput.cast(inputs.itemById('selectFacesInput'))
+    errorTextInput = adsk.core.TextBoxCommandInput.cast(inputs.itemById('errorTextInput'))
+
+    global replay_records, replay_message
+    if changed_input.id == 'replayPlanInput':
+        plan_path = pipeline.ask_plan_file(save=False)
+        if plan_path:
+            try:
+                replay_records = rutil.read_plan(plan_path)
+                replay_message = f'{len(replay_records)} components will be reoriented from {os.path.basename(plan_path)}.'
+            except (OSError, ValueError, KeyError) as error:
+                replay_records = None
+                replay_message = f'ERROR: Cannot read the plan: {error}'
+
+        # No face is needed to replay a plan.
+        select_faces_input.setSelectionLimits(0 if replay_records else 1, 0)
+
+    error_message = ''
+    components = set()
+    for face in get_selected_faces(select_faces_input):
+        body = face.body
+        error_message = pipeline.validate_body(body, root_comp)
+        if error_message:
+            break
+
+        key = rutil.component_key(body.parentComponent)
+        if key in components:
+            error_message = 'ERROR: Select only one face per component.'
+            break
+        components.add(key)
+
+    errorTextInput.text = error_message or replay_message
+    is_valid = not error_message
+
+
+# This event handler is called when the user interacts with any of the inputs in the dialog
+# which allows you to verify that all of the inputs are valid and enables the OK button.
+def command_validate_input(args: adsk.core.ValidateInputsEventArgs):
+    inputs = args.inputs
+
+    select_faces_input = adsk.core.SelectionCommandInput.cast(inputs.itemById('selectFacesInput'))
+    errorTextInput = adsk.core.TextBoxCommandInput.cast(inputs.itemById('errorTextInput'))
+
+    if select_faces_input.selectionCount:
+        args.areInputsValid = is_valid
+    elif replay_records:
+        args.areInputsValid = True
+    else:
+        args.areInputsValid = False
+        errorTextInput.text = 'No face selected.'
+
+
+def command_destroy(args: adsk.core.CommandEventArgs):
+    # This event handler is called when the command terminates.
+    # General logging for debug.
+    futil.log(f"{CMD_NAME} Command Destroy Event")
+
+    global local_handlers, is_valid, replay_records, replay_message
+    local_handlers = []
+
+    # Write out the log messages buffered while the command was running.
+    futil.flush_log()
+    is_valid = False
+    replay_records = None
+    replay_message = ''
+    futil.end_session(CMD_NAME)
+
+
+# Returns the selected faces of a selection input as BRepFaces.
+def get_selected_faces(select_faces_input: adsk.core.SelectionCommandInput) -> list:
+    return [
+        adsk.fusion.BRepFace.cast(select_faces_input.selection(i).entity)
+        for i in range(select_faces_input.selectionCount)
+    ]
@@ -0,0 +1,26 @@
+# Identity and placement of the command's button. Kept apart from entry.py so
+# the button can be created at startup without importing the command itself,
+# which is only loaded when the button is first clicked.
+
+import os
+from ... import config
+from ..batchReorient import definition as batch_definition
+
+# TODO *** Specify the command identity information. ***
+CMD_ID = f"{config.COMPANY_NAME}_{config.ADDIN_NAME}_diagnosticsCmdDialog"
+CMD_NAME = "Reorient Diagnostics"
+CMD_Description = "Show the event handlers, Fusion objects and Python memory held by the add-in and by each command session."
+
+# Specify that the command will be promoted to the panel.
+IS_PROMOTED = False
+
+# TODO *** Define the location where the command button will be created. ***
+# This is done by specifying the workspace, the tab, and the panel, and the
+# command it will be inserted beside. Not providing the command to position it
+# will insert it at the end.
+WORKSPACE_ID = "FusionSolidEnvironment"
+PANEL_ID = "SolidScriptsAddinsPanel"
+COMMAND_BESIDE_ID = batch_definition.CMD_ID
+
+# Resource location for command icons, here we assume a sub folder in this directory named "resources".
+ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources", "")
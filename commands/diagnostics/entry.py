@@ -0,0 +1,86 @@
+import adsk.core
+from ...lib import fusionAddInUtils as futil
+from .definition import CMD_NAME
+
+# Local list of event handlers used to maintain a reference so
+# they are not released and garbage collected.
+local_handlers = []
+
+# Executed when the command is first used. The button itself is created at
+# startup from definition.py, see commands/__init__.py.
+def start():
+    pass
+
+
+# Executed when add-in is stopped, if the command was used.
+def stop():
+    pass
+
+
+# Function that is called when a user clicks the corresponding button in the UI.
+# This defines the contents of the command dialog and connects to the command related events.
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    # General logging for debug.
+    futil.log(f"{CMD_NAME} Command Created Event")
+
+    # https://help.autodesk.com/view/fusion360/ENU/?contextId=CommandInputs
+    inputs = args.command.commandInputs
+
+    # when checked every command session is recorded, with tracemalloc running
+    record_input = inputs.addBoolValueInput('recordSessionsInput', 'Record Sessions', True, '', futil.is_diagnosing())
+    record_input.tooltip = 'Record the Python heap and the references kept by each command session. Slows the add-in down.'
+
+    # button that runs the garbage collector and builds the report again
+    refresh_input = inputs.addBoolValueInput('refreshInput', 'Refresh', False, '', False)
+    refresh_input.tooltip = 'Collect the released objects and update the report.'
+
+    report_input = inputs.addTextBoxCommandInput('reportInput', 'Report', '', 16, True)
+    report_input.isFullWidth = True
+    report_input.text = futil.diagnostics_report()
+
+    futil.add_handler(
+        args.command.execute, command_execute, local_handlers=local_handlers
+    )
+    futil.add_handler(
+        args.command.inputChanged, command_input_changed, local_handlers=local_handlers
+    )
+    futil.add_handler(
+        args.command.destroy, command_destroy, local_handlers=local_handlers
+    )
+
+
+# This event handler is called when the user clicks the OK button in the command dialog.
+def command_execute(args: adsk.core.CommandEventArgs):
+    # General logging for debug.
+    futil.log(f"{CMD_NAME} Command Execute Event")
+
+    # Keep a copy of the report in the Text Commands window.
+    futil.log(futil.diagnostics_report(), force_console=True)
+
+
+# This event handler is called when the user changes anything in the command dialog
+# allowing you to modify values of other inputs based on that change.
+def command_input_changed(args: adsk.core.InputChangedEventArgs):
+    changed_input = args.input
+    inputs = args.inputs
+
+    # General logging for debug.
+    futil.log("%s Input Changed Event fired from a change to %s", args=(CMD_NAME, changed_input.id))
+
+    if changed_input.id == 'recordSessionsInput':
+        futil.enable_diagnostics(adsk.core.BoolValueCommandInput.cast(changed_input).value)
+
+    report_input = adsk.core.TextBoxCommandInput.cast(inputs.itemById('reportInput'))
+    report_input.text = futil.diagnostics_report()
+
+
+def command_destroy(args: adsk.core.CommandEventArgs):
+    # This event handler is called when the command terminates.
+    # General logging for debug.
+    futil.log(f"{CMD_NAME} Command Destroy Event")
+
+    global local_handlers
+    local_handlers = []
+
+    # Write out the log messages buffered while the command was running.
+    futil.flush_log()
@@ -0,0 +1,89 @@
+import importlib
+import time
+
+import adsk.core
+from ..lib import fusionAddInUtils as futil
+
+
+class LazyCommand:
+    """A command whose button is created at startup and whose module is only
+    imported when the button is first clicked.
+
+    The command package provides a definition module with the identity and
+    placement of the button, and an entry module with start, stop and
+    command_created functions. The entry module is imported, and its start
+    function called, on the first commandCreated event.
+
+    Arguments:
+    package -- Name of the command package, relative to the commands package.
+    """
+
+    def __init__(self, package: str):
+        self.package = package
+        self.definition = None
+        self.module = None
+        self.load_time = None
+
+    def start(self):
+        """Creates the command definition and its button."""
+        ui = futil.get_app().userInterface
+        definition = self.definition = importlib.import_module(f'{__package__}.{self.package}.definition')
+
+        # Create a command Definition.
+        cmd_def = ui.commandDefinitions.addButtonDefinition(
+            definition.CMD_ID, definition.CMD_NAME, definition.CMD_Description, definition.ICON_FOLDER
+        )
+
+        # The command module is loaded by the first command created event.
+        futil.add_handler(cmd_def.commandCreated, self.command_created, name=definition.CMD_ID)
+
+        # ******** Add a button into the UI so the user can run the command. ********
+        # Get the target workspace the button will be created in.
+        workspace = ui.workspaces.itemById(definition.WORKSPACE_ID)
+
+        # Get the panel the button will be created in.
+        panel = workspace.toolbarPanels.itemById(definition.PANEL_ID)
+
+        # Create the button command control in the UI after the specified existing command.
+        control = panel.controls.addCommand(cmd_def, definition.COMMAND_BESIDE_ID, False)
+
+        # Specify if the command is promoted to the main toolbar.
+        control.isPromoted = definition.IS_PROMOTED
+
+    def stop(self):
+        """Stops the command module if it was loaded and removes the button."""
+        if self.module is not None:
+            self.module.stop()
+
+        if self.definition is None:
+            return
+
+        # Get the various UI elements for this command
+        ui = futil.get_app().userInterface
+        workspace = ui.workspaces.itemById(self.definition.WORKSPACE_ID)
+        panel = workspace.toolbarPanels.itemById(self.definition.PANEL_ID)
+        command_control = panel.controls.itemById(self.definition.CMD_ID)
+        command_definition = ui.commandDefinitions.itemById(self.definition.CMD_ID)
+
+        # Delete the button command control
+        if command_control:
+            command_control.deleteMe()
+
+        # Delete the command definition
+        if command_definition:
+            command_definition.deleteMe()
+
+    def load(self):
+        """Imports and starts the command module, once, and returns it."""
+        if self.module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(f'{__package__}.{self.package}.entry')
+            module.start()
+            self.module = module
+            self.load_time = time.perf_counter() - start
+            futil.record_time(f'load.{self.package}', self.load_time)
+            futil.log(f'Loaded {self.package} in {self.load_time * 1000:.1f} ms')
+        return self.module
+
+    def command_created(self, args: adsk.core.CommandCreatedEventArgs):
+        self.load().command_created(args)
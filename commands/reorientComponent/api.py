@@ -0,0 +1,307 @@
+# Scripting interface to the reorientation, usable without the command dialog,
+# e.g. from another script or the Text Commands window:
+#
+#   api.reorient(occurrence, api.LAY_FLAT)
+#   api.reorient_all(design, api.LARGEST_FACE)
+#   api.replay_plan(design, 'plan.json')
+#   api.reorient_documents(api.document_sources(folder), api.LARGEST_FACE)
+#
+# It runs the same validation and transform pipeline as the commands.
+
+import functools
+import gc
+import os
+import time
+
+import adsk.core
+import adsk.fusion
+from ...lib import fusionAddInUtils as futil
+from ...lib import reorientUtils as rutil
+from . import pipeline
+
+# Names of the built-in face rules.
+LAY_FLAT = 'lay_flat'
+LARGEST_FACE = 'largest_face'
+
+
+class ReorientError(Exception):
+    """Raised when a component cannot be reoriented. The message is the same one
+    the command dialog shows."""
+
+
+def _entry_point(function):
+    # Scripts run outside of any command, so nothing else keeps the pipeline's
+    # caches in step with the documents or writes out the log messages buffered
+    # during the call.
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        pipeline.start()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            futil.flush_log()
+    return wrapper
+
+
+def largest_planar_face(body: adsk.fusion.BRepBody) -> adsk.fusion.BRepFace:
+    """Face rule returning the planar face with the largest area, or None."""
+    largest_face = None
+    for face in body.faces:
+        if face.geometry.surfaceType != adsk.core.SurfaceTypes.PlaneSurfaceType:
+            continue
+        if largest_face is None or face.area > largest_face.area:
+            largest_face = face
+    return largest_face
+
+
+# Face rules by name. A rule takes the body to reorient and returns the face it
+# should rest on, or None when it has no suitable face.
+RULES = {
+    LAY_FLAT: pipeline.best_face,
+    LARGEST_FACE: largest_planar_face,
+}
+
+
+@_entry_point
+def reorient(component, face_or_rule=LAY_FLAT, extra_rotation=None) -> tuple:
+    """Reorients a component so the chosen face rests on the XY plane, keeping the
+    component's bodies in place in the assembly.
+
+    Returns the transform applied to the body as a rutil.transform tuple.
+
+    Arguments:
+    component -- The Occurrence to reorient, or a Component in which case its
+                 first occurrence is used.
+    face_or_rule -- A planar BRepFace of the component, the name of one of RULES,
+                    or a callable taking the component's first body and returning
+                    the face.
+    extra_rotation -- Optional transform applied after the alignment, like the
+                      triad of the dialog. Either a Matrix3D or a
+                      rutil.transform tuple.
+    """
+    occurrence, body_transform = prepare(component, face_or_rule, extra_rotation)
+    pipeline.reorient_occurrence(occurrence.component.parentDesign, occurrence, body_transform)
+    return body_transform
+
+
+@_entry_point
+def reorient_all(design: adsk.fusion.Design, rule=LAY_FLAT, plan_path: str = None) -> dict:
+    """Reorients every component of a design that has bodies as one operation: a
+    single deferred compute scope, rolled back as a whole if any step fails.
+
+    Returns a dictionary mapping each component name to an empty string when it
+    was reoriented, or to the reason it was skipped.
+
+    Arguments:
+    design -- The design to process.
+    rule -- The face rule, see reorient.
+    plan_path -- Optional file the reorientations are written to, so they can be
+                 applied again with replay_plan.
+    """
+    results = {}
+    records = []
+    root_comp = design.rootComponent
+    plan = rutil.ExecutionPlan()
+
+    for component in design.allComponents:
+        if component == root_comp or component.bRepBodies.count == 0:
+            continue
+        try:
+            occurrence, face, body_transform = _prepare(component, rule)
+        except ReorientError as error:
+            results[component.name] = str(error)
+            continue
+        pipeline.plan_reorientation(plan, design, occurrence, body_transform)
+        records.append(pipeline.plan_record(occurrence, face, body_transform))
+        results[component.name] = ''
+
+    pipeline.execute_plan(design, plan)
+
+    if plan_path:
+        rutil.write_plan(plan_path, records)
+
+    failed = sum(1 for message in results.values() if message)
+    futil.log(f'Reoriented {len(results) - failed} of {len(results)} components, {failed} skipped')
+    return results
+
+
+@_entry_point
+def replay_plan(design: adsk.fusion.Design, plan_path: str) -> dict:
+    """Applies a plan file written by reorient_all or the batch command to a
+    design as one operation. The stored transforms are applied as they are,
+    without evaluating any face.
+
+    Returns a dictionary mapping each component name to an empty string when it
+    was reoriented, or to the reason it was skipped.
+
+    Arguments:
+    design -- The design to apply the plan to.
+    plan_path -- The plan file, see rutil.read_plan.
+    """
+    plan = rutil.ExecutionPlan()
+    results = pipeline.plan_replay(plan, design, rutil.read_plan(plan_path))
+    pipeline.execute_plan(design, plan)
+
+    failed = sum(1 for message in results.values() if message)
+    futil.log(f'Replayed {len(results) - failed} of {len(results)} components from {plan_path}, {failed} skipped')
+    return results
+
+
+@_entry_point
+def reorient_documents(sources, rule=LAY_FLAT, output_folder: str = None, report_path: str = None) -> rutil.BulkReport:
+    """Reorients every component of many documents with reorient_all, one
+    document at a time. Each document is opened, reoriented, saved and closed
+    before the next one is opened, and nothing of it is kept afterwards, so the
+    memory used does not grow with the number of documents.
+
+    A document that fails is closed without saving and the next one is
+    processed. Returns a rutil.BulkReport with the time spent on each document and
+    the failures, which is also logged.
+
+    Arguments:
+    sources -- Iterable of the documents to process, see document_sources. A
+               DataFile is saved as a new version, a local .f3d file is exported
+               back to its path, or to output_folder.
+    rule -- The face rule, see reorient.
+    output_folder -- Optional folder the local files are exported to instead of
+                     overwriting them.
+    report_path -- Optional file the report is written to as JSON.
+    """
+    report = rutil.BulkReport()
+    for source in sources:
+        report.add(_reorient_document(source, rule, output_folder))
+
+        # Free the API objects of the closed document before opening the next.
+        gc.collect()
+
+    futil.log(report.summary())
+    if report_path:
+        report.write(report_path)
+    return report
+
+
+def document_sources(folder):
+    """Yields the Fusion designs of a folder, for reorient_documents.
+
+    Arguments:
+    folder -- A DataFolder, whose f3d DataFiles are yielded, or the path of a
+              local directory, whose .f3d files are yielded.
+    """
+    if isinstance(folder, str):
+        for name in sorted(os.listdir(folder)):
+            if name.lower().endswith('.f3d'):
+                yield os.path.join(folder, name)
+        return
+
+    data_files = folder.dataFiles
+    for i in range(data_files.count):
+        data_file = data_files.item(i)
+        if data_file.fileExtension == 'f3d':
+            yield data_file
+
+
+@_entry_point
+def prepare(component, face_or_rule=LAY_FLAT, extra_rotation=None) -> tuple:
+    """Validates a reorientation and computes its transform without modifying the
+    design. Takes the same arguments as reorient.
+
+    Returns the occurrence to reorient and the body transform.
+    """
+    occurrence, _, body_transform = _prepare(component, face_or_rule, extra_rotation)
+    return occurrence, body_transform
+
+
+def _prepare(component, face_or_rule=LAY_FLAT, extra_rotation=None) -> tuple:
+    # prepare, also returning the face the component is laid on.
+    occurrence = adsk.fusion.Occurrence.cast(component)
+    if occurrence:
+        component = occurrence.component
+    else:
+        occurrence = pipeline.first_occurrence(component)
+    if not occurrence:
+        raise ReorientError('ERROR: Cannot move root component.')
+
+    face = adsk.fusion.BRepFace.cast(face_or_rule)
+    if face:
+        if rutil.component_key(face.body.parentComponent) != rutil.component_key(component):
+            raise ReorientError('ERROR: The face does not belong to the component.')
+        if not face.assemblyContext:
+            face = face.createForAssemblyContext(occurrence)
+    else:
+        if component.bRepBodies.count == 0:
+            raise ReorientError('ERROR: This component has no body.')
+        body = component.bRepBodies.item(0).createForAssemblyContext(occurrence)
+        rule = RULES[face_or_rule] if isinstance(face_or_rule, str) else face_or_rule
+        face = rule(body)
+        if not face:
+            raise ReorientError('ERROR: No planar face to rest the component on.')
+
+    error_message = pipeline.validate_body(face.body, component.parentDesign.rootComponent)
+    if error_message:
+        raise ReorientError(error_message)
+
+    body_transform = pipeline.face_alignment(face)
+    if extra_rotation is not None:
+        if not isinstance(extra_rotation, tuple):
+            extra_rotation = rutil.transform.from_matrix3d(extra_rotation)
+        body_transform = rutil.transform.transform_by(body_transform, extra_rotation)
+
+    return occurrence, face, body_transform
+
+
+def _reorient_document(source, rule, output_folder: str) -> rutil.DocumentResult:
+    # Opens, reorients, saves and closes one document of reorient_documents.
+    start = time.perf_counter()
+    name = os.path.basename(source) if isinstance(source, str) else source.name
+    document = None
+    results = {}
+    error = ''
+    try:
+        document = _open_document(source)
+        design = adsk.fusion.Design.cast(document.products.itemByProductType('DesignProductType'))
+        if not design:
+            raise ReorientError('ERROR: The document has no design.')
+
+        results = reorient_all(design, rule)
+        if any(not message for message in results.values()):
+            _save_document(document, design, source, output_folder)
+    except Exception as exception:
+        error = str(exception) or type(exception).__name__
+        futil.log(f'Bulk reorientation of {name} failed: {error}', adsk.core.LogLevels.WarningLogLevel)
+    finally:
+        if document is not None:
+            try:
+                document.close(False)
+            except Exception as exception:
+                error = error or f'Cannot close the document: {exception}'
+
+        # The caches refer to the closed document.
+        pipeline.invalidate_geometry()
+        pipeline.occurrence_index.reset(None)
+
+    skipped = sum(1 for message in results.values() if message)
+    return rutil.DocumentResult(name, time.perf_counter() - start, len(results) - skipped, skipped, error)
+
+
+def _open_document(source) -> adsk.core.Document:
+    # DataFiles are opened in the background, local files imported into a new
+    # document.
+    app = futil.get_app()
+    if not isinstance(source, str):
+        return app.documents.open(source, False)
+
+    import_manager = app.importManager
+    options = import_manager.createFusionArchiveImportOptions(source)
+    return import_manager.importToNewDocument(options)
+
+
+def _save_document(document: adsk.core.Document, design: adsk.fusion.Design, source, output_folder: str):
+    if not isinstance(source, str):
+        if not document.save('Reoriented components'):
+            raise RuntimeError('Cannot save the document.')
+        return
+
+    path = os.path.join(output_folder, os.path.basename(source)) if output_folder else source
+    export_manager = design.exportManager
+    if not export_manager.execute(export_manager.createFusionArchiveExportOptions(path)):
+        raise RuntimeError(f'Cannot export the design to {path}.')
@@ -1,82 +1,42 @@
 import adsk.core
 import adsk.fusion
-import os
 import math
+import time
 from ...lib import fusionAddInUtils as futil
+from ...lib import reorientUtils as rutil
 from ... import config
+from . import pipeline
+from .definition import CMD_ID, CMD_NAME
+from .session import ReorientSession
 import traceback
 
 app = adsk.core.Application.get()
 ui = app.userInterface
 
 # global variables *********************************************
-body_transform_matrix = adsk.core.Matrix3D.create()
-original_occ_transform = adsk.core.Matrix3D.create()
-selected_body = None
-is_valid = False
-
-# TODO *** Specify the command identity information. ***
-CMD_ID = f"{config.COMPANY_NAME}_{config.ADDIN_NAME}_cmdDialog"
-CMD_NAME = "Reorient Component"
-CMD_Description = "Reorient the selected component while maintaining the same orientation of the bodies inside."
-
-# Specify that the command will be promoted to the panel.
-IS_PROMOTED = True
-
-# TODO *** Define the location where the command button will be created. ***
-# This is done by specifying the workspace, the tab, and the panel, and the
-# command it will be inserted beside. Not providing the command to position it
-# will insert it at the end.
-WORKSPACE_ID = "FusionSolidEnvironment"
-PANEL_ID = "SolidScriptsAddinsPanel"
-COMMAND_BESIDE_ID = "ScriptsManagerCommand"
-
-# Resource location for command icons, here we assume a sub folder in this directory named "resources".
-ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources", "")
+# State of the running command, created in command_created and released in
+# command_destroy.
+session = None
+
+# Waits for the triad to settle after a drag, so the latest state is rendered in
+# full, see settle_preview.
+preview_jobs = futil.BackgroundJobs(f"{config.COMPANY_NAME}_{config.ADDIN_NAME}_previewJobs")
 
 # Local list of event handlers used to maintain a reference so
 # they are not released and garbage collected.
 local_handlers = []
 
-# Executed when add-in is run.
+# Executed when the command is first used. The button itself is created at
+# startup from definition.py, see commands/__init__.py.
 def start():
-    # Create a command Definition.
-    cmd_def = ui.commandDefinitions.addButtonDefinition(
-        CMD_ID, CMD_NAME, CMD_Description, ICON_FOLDER
-    )
-
-    # Define an event handler for the command created event. It will be called when the button is clicked.
-    futil.add_handler(cmd_def.commandCreated, command_created)
-
-    # ******** Add a button into the UI so the user can run the command. ********
-    # Get the target workspace the button will be created in.
-    workspace = ui.workspaces.itemById(WORKSPACE_ID)
-
-    # Get the panel the button will be created in.
-    panel = workspace.toolbarPanels.itemById(PANEL_ID)
-
-    # Create the button command control in the UI after the specified existing command.
-    control = panel.controls.addCommand(cmd_def, COMMAND_BESIDE_ID, False)
+    pipeline.start(CMD_ID)
+    preview_jobs.start()
 
-    # Specify if the command is promoted to the main toolbar.
-    control.isPromoted = IS_PROMOTED
 
-
-# Executed when add-in is stopped.
+# Executed when add-in is stopped, if the command was used.
 def stop():
-    # Get the various UI elements for this command
-    workspace = ui.workspaces.itemById(WORKSPACE_ID)
-    panel = workspace.toolbarPanels.itemById(PANEL_ID)
-    command_control = panel.controls.itemById(CMD_ID)
-    command_definition = ui.commandDefinitions.itemById(CMD_ID)
-
-    # Delete the button command control
-    if command_control:
-        command_control.deleteMe()
-
-    # Delete the command definition
-    if command_definition:
-        command_definition.deleteMe()
+    preview_jobs.stop()
+    pipeline.stop()
 
 
 # Function that is called when a user clicks the corresponding button in the UI.
@@ -84,10 +44,17 @@ def stop():
 def command_created(args: adsk.core.CommandCreatedEventArgs):
     # General logging for debug.
     futil.log(f"{CMD_NAME} Command Created Event")
+    futil.begin_session(CMD_NAME, __name__)
 
     # https://help.autodesk.com/view/fusion360/ENU/?contextId=CommandInputs
     inputs = args.command.commandInputs
 
+    global session
+    design = adsk.fusion.Design.cast(app.activeProduct)
+    scheduler = rutil.PreviewScheduler(config.PREVIEW_MAX_RATE, config.PREVIEW_LOW_FIDELITY, config.PREVIEW_SETTLE_TIME)
+    session = ReorientSession(design, args.command, scheduler)
+    pipeline.occurrence_index.bind(design)
+
     # TODO Define the dialog for your command by adding different inputs to the command.
 
     # selection input for selecting planar face
@@ -99,6 +66,18 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     triad_input = inputs.addTriadCommandInput('triadInput', initial_matrix)
     triad_input.hideAll()
 
+    # button that swaps the selected face for the best face to lay the body flat on
+    lay_flat_input = inputs.addBoolValueInput('layFlatInput', 'Lay Flat', False, '', False)
+    lay_flat_input.tooltip = 'Select the planar face the body rests best on.'
+
+    # when checked triad drags only show the bounding box of the body
+    low_fidelity_input = inputs.addBoolValueInput('lowFidelityInput', 'Fast Preview', True, '', config.PREVIEW_LOW_FIDELITY)
+    low_fidelity_input.tooltip = 'Show only the bounding box of the body while the triad is dragged.'
+
+    # when checked the reorientation is saved to a plan file after it is applied
+    export_plan_input = inputs.addBoolValueInput('exportPlanInput', 'Export Plan', True, '', False)
+    export_plan_input.tooltip = 'Save the reorientation to a plan file that can be replayed on a later revision.'
+
     errorTextInput = inputs.addTextBoxCommandInput('errorTextInput', 'Log', '', 3, True)
     errorTextInput.isFullWidth = True
 
@@ -129,62 +108,27 @@ def command_execute(args: adsk.core.CommandEventArgs):
     futil.log(f"{CMD_NAME} Command Execute Event")
 
     inputs = args.command.commandInputs
-
-    product = app.activeProduct    
-    design = adsk.fusion.Design.cast(product)    
-    root_comp = design.rootComponent    
-    features = root_comp.features    
-    
-    global selected_body, body_transform_matrix
+    triad_input = adsk.core.TriadCommandInput.cast(inputs.itemById('triadInput'))
+    export_plan_input = adsk.core.BoolValueCommandInput.cast(inputs.itemById('exportPlanInput'))
 
     # TODO ******************************** Your code here ********************************
 
-    # Find the occurrence that contains the selected_body (A)
-    selected_occurrence = None
-    for occ in root_comp.allOccurrences:
-        for body in occ.bRepBodies:
-            if body == selected_body:
-                selected_occurrence = occ
-                selected_occurrence.isGrounded = False
-                selected_occurrence.isGroundToParent = False
-                break
-        if selected_occurrence:
-            break
-    
-    occ_init_transform = selected_occurrence.transform2.copy()
-    inverse_occ_init_transform = occ_init_transform.copy()
-    inverse_occ_init_transform.invert()
-
-    selected_occurrence.transform2 = adsk.core.Matrix3D.create()
-
-    # check if there is transformation
-    if not body_transform_matrix.isEqualTo(adsk.core.Matrix3D.create()):
-        body_collection = adsk.core.ObjectCollection.create()
-        body_collection.add(selected_body)
-        moveFeats = features.moveFeatures
-        moveFeatureInput = moveFeats.createInput2(body_collection)
-        moveFeatureInput.defineAsFreeMove(body_transform_matrix)
-        moveFeats.add(moveFeatureInput)
-
-    selected_occurrence.transform2 = occ_init_transform
-    
-    # get the inverse of body's transform (IBT)
-    inverse_body_transform = body_transform_matrix.copy()
-    inverse_body_transform.invert()
+    session.clear_outline()
+    session.set_triad(rutil.transform.from_matrix3d(triad_input.transform))
+    body_transform = session.update_body_transform(pipeline.face_alignment)
 
-    # apply the inverse of body's transform to all occurrences referencing component
-    component = selected_body.parentComponent
-    occurrences = root_comp.allOccurrencesByComponent(component)
+    # Describe the reorientation for the plan file before the face moves.
+    record = None
+    if export_plan_input.value:
+        record = pipeline.plan_record(session.occurrence, session.face, body_transform, session.triad_matrix)
 
-    for i in range(occurrences.count):
-        occ = occurrences.item(i)
-        occ_transform = occ.transform2.copy()
+    pipeline.reorient_occurrence(session.design, session.occurrence, body_transform)
 
-        # post-multiply. get local transformation in global form
-        transform = inverse_body_transform.copy()
-        transform.transformBy(occ_transform)
-
-        occ.transform2 = transform
+    if record:
+        plan_path = pipeline.ask_plan_file(save=True)
+        if plan_path:
+            rutil.write_plan(plan_path, [record])
+            futil.log(f"{CMD_NAME} saved the reorientation of {record.component_name} to {plan_path}")
 
 
 # This event handler is called when the command needs to compute a new preview in the graphics window.
@@ -192,91 +136,68 @@ def command_preview(args: adsk.core.CommandEventArgs):
     # General logging for debug.
     futil.log(f"{CMD_NAME} Command Preview Event")
     inputs = args.command.commandInputs
+    root_comp = session.design.rootComponent
 
-    product = app.activeProduct
-    design = adsk.fusion.Design.cast(product)
-    root_comp = design.rootComponent
-    features = root_comp.features
-
-    global body_transform_matrix, selected_body, is_valid
-    
-    # Grabing inputs **********************************************************************
+    # TODO ******************************** Your code here ********************************
 
-    select_face_input = adsk.core.SelectionCommandInput.cast(inputs.itemById('selectFaceInput'))
-    triad_input = adsk.core.TriadCommandInput.cast(inputs.itemById('triadInput'))
+    if session.face is None:
+        futil.log(f'not selected')
+        root_comp.isOriginFolderLightBulbOn = False
+        return
 
-    # TODO ******************************** Your code here ********************************
+    if not session.is_valid:
+        return
 
-    if not is_valid:
+    root_comp.isOriginFolderLightBulbOn = True
+    session.clear_outline()
+
+    # During a triad drag the scheduler coalesces the previews, see
+    # rutil.PreviewScheduler. Unless this one is rendered in full, make sure the
+    # latest state is once the triad settles.
+    preview = session.scheduler.next_preview()
+    if preview != rutil.FULL_PREVIEW and not preview_jobs.pending:
+        preview_jobs.submit(time.sleep, session.scheduler.release_delay(), on_done=settle_preview)
+
+    # The face alignment is only recomputed when the selection changed and the
+    # body transform only when the triad moved, see command_input_changed.
+    if preview != rutil.LAST_PREVIEW:
+        session.previews += 1
+        if not session.is_dirty:
+            session.previews_reused += 1
+        body_transform = session.update_body_transform(pipeline.face_alignment)
+
+    if preview == rutil.OUTLINE_PREVIEW:
+        session.outline = pipeline.draw_outline(root_comp, session.body, body_transform)
+        return
+    if preview == rutil.FULL_PREVIEW:
+        session.preview_matrix = rutil.transform.to_matrix3d(body_transform)
+
+    # Preview the move with a transient occurrence transform instead of a
+    # MoveFeature. With the occurrence at identity, moving the occurrence by
+    # the body transform looks the same as moving the body inside it, and
+    # Fusion rolls the change back when the preview ends.
+    if session.occurrence:
+        session.occurrence.transform2 = session.preview_matrix
+        futil.count_call('Occurrence.transform2')
+        session.occurrence.isIsolated = True
+
+
+# Called by preview_jobs on the main thread once a drag may be over. Renders
+# the latest state in full when the triad stayed still for long enough, waits
+# again otherwise.
+def settle_preview(_=None):
+    if session is None or session.command is None:
         return
 
-    count = select_face_input.selectionCount
-    if count:        
-        face = select_face_input.selection(0).entity
-        face = adsk.fusion.BRepFace.cast(face)
-        
-        body = face.body
-        body_collection = adsk.core.ObjectCollection.create()
-        body_collection.add(body)
-        selected_body = body
-
-        root_comp.isOriginFolderLightBulbOn = True
-        
-        # Find the occurrence that contains the selected_body
-        selected_occurrence = None
-        for occ in root_comp.allOccurrences:
-            for body in occ.bRepBodies:
-                if body == selected_body:
-                    selected_occurrence = occ
-                    selected_occurrence.transform2 = adsk.core.Matrix3D.create()
-                    selected_occurrence.isIsolated = True
-                    break
-            if selected_occurrence:
-                break
-        
-        face_evaluator = face.evaluator
-        face_center = face.centroid
-        (returnValue, face_normal) = face_evaluator.getNormalAtPoint(face_center)
-
-        face_center = adsk.core.Point3D.cast(face_center)
-        face_normal = adsk.core.Vector3D.cast(face_normal)
-
-        target_origin = adsk.core.Point3D.create(0, 0, 0)
-        target_normal = adsk.core.Vector3D.create(0, 0, -1)
-
-        transform_matrix = adsk.core.Matrix3D.create()
-
-        # Translate the face's point to the target origin
-        translation_vector = face_center.vectorTo(target_origin)
-        transform_matrix.translation = translation_vector
-
-        # Create a rotation matrix and combine with the translation
-        # Note: This is a simplified rotation. For complex alignments,
-        # you might need to consider multiple rotations or a more robust alignment algorithm.
-        # For a planar face, aligning its normal and then translating its point usually works.
-        rotation_matrix = adsk.core.Matrix3D.create()
-        rotation_matrix.setToRotateTo(face_normal, target_normal)
-
-        triad_rotation_matrix = triad_input.transform.copy()
-
-        # Combine translation and rotation (order matters: rotate then translate)
-        transform_matrix.transformBy(rotation_matrix)
-        transform_matrix.transformBy(triad_rotation_matrix)
-
-        body_transform_matrix = transform_matrix
-
-        # check if there is transformation and move if not
-        if not transform_matrix.isEqualTo(adsk.core.Matrix3D.create()):
-            moveFeats = features.moveFeatures
-            moveFeatureInput = moveFeats.createInput2(body_collection)
-            moveFeatureInput.defineAsFreeMove(transform_matrix)
-            moveFeats.add(moveFeatureInput)
+    delay = session.scheduler.release_delay()
+    if delay is None:
+        return
+    if delay > 0:
+        preview_jobs.submit(time.sleep, delay, on_done=settle_preview)
+        return
 
-    else:
-        futil.log(f'not selected')
-        body_transform_matrix = adsk.core.Matrix3D.create()
-        selected_body = None
-        root_comp.isOriginFolderLightBulbOn = False
+    session.scheduler.release()
+    session.command.doExecutePreview()
 
 
 # This event handler is called when the user changes anything in the command dialog
@@ -285,14 +206,23 @@ def command_input_changed(args: adsk.core.InputChangedEventArgs):
     changed_input = args.input
     inputs = args.inputs
 
-    product = app.activeProduct
-    design = adsk.fusion.Design.cast(product)
-    root_comp = design.rootComponent
+    # General logging for debug.
+    futil.log("%s Input Changed Event fired from a change to %s", args=(CMD_NAME, changed_input.id))
+
+    # A triad drag only changes the body transform, the selection and its
+    # verdict are unchanged so skip straight to the preview.
+    if changed_input.id == 'triadInput':
+        triad_input = adsk.core.TriadCommandInput.cast(changed_input)
+        session.set_triad(rutil.transform.from_matrix3d(triad_input.transform))
+        session.scheduler.moved()
+        session.validations_skipped += 1
+        return
 
-    global is_valid
+    if changed_input.id == 'lowFidelityInput':
+        session.scheduler.low_fidelity = adsk.core.BoolValueCommandInput.cast(changed_input).value
+        return
 
-    # General logging for debug.
-    futil.log(f"{CMD_NAME} Input Changed Event fired from a change to {changed_input.id}")
+    root_comp = session.design.rootComponent
 
     # Grabing inputs **********************************************************************
 
@@ -302,35 +232,32 @@ def command_input_changed(args: adsk.core.InputChangedEventArgs):
 
     # TODO ******************************** Your code here ********************************
 
+    if changed_input.id == 'layFlatInput' and select_face_input.selectionCount:
+        face = adsk.fusion.BRepFace.cast(select_face_input.selection(0).entity)
+        best_face = pipeline.best_face(face.body)
+        if best_face and best_face != face:
+            select_face_input.clearSelection()
+            select_face_input.addSelection(best_face)
+
     if select_face_input.selectionCount:
         face = select_face_input.selection(0).entity
         face = adsk.fusion.BRepFace.cast(face)
-        body = face.body
-        parent_component = body.parentComponent
-
-        comp_child_occs = parent_component.occurrences
-        comp_bodies = parent_component.bRepBodies
-        comp_is_root = parent_component == root_comp
-
-        futil.log(f'comp_child_occs >>> {comp_child_occs}')
-        futil.log(f'comp_bodies >>> {comp_bodies}')
-        futil.log(f'comp_is_root >>> {comp_is_root}')
-
-        if comp_child_occs.count > 0:
-            errorTextInput.text = 'ERROR: This component is an assembly.'
-            is_valid = False
-        elif comp_bodies.count > 1:
-            errorTextInput.text = 'ERROR: This component contains more than one body.'
-            is_valid = False
-        elif comp_is_root:
-            errorTextInput.text = 'ERROR: Cannot move root component.'
-            is_valid = False
+
+        if session.select_face(face):
+            session.occurrence = pipeline.occurrence_index.lookup(session.body)
+            session.scheduler.release()
+
+            error_message = session.validate(lambda body: pipeline.validate_body(body, root_comp))
+            if error_message:
+                errorTextInput.text = error_message
+            session.is_valid = not error_message
         else:
-            is_valid = True
+            session.validations_skipped += 1
 
-            if not triad_input.isZRotationVisible:
-                triad_input.isZRotationVisible = True
+        if session.is_valid and not triad_input.isZRotationVisible:
+            triad_input.isZRotationVisible = True
     else:
+        session.select_face(None)
         triad_input.isZRotationVisible = False
 
 
@@ -349,8 +276,10 @@ def command_validate_input(args: adsk.core.ValidateInputsEventArgs):
 
     # TODO ******************************** Your code here ********************************
     
+    # A selection that failed validation, e.g. a face of a root component body,
+    # has no occurrence to reorient.
     if select_face_input.selectionCount:
-        args.areInputsValid = True
+        args.areInputsValid = session is not None and session.is_valid
     else:
         args.areInputsValid = False
         errorTextInput.text = 'No face selected.'
@@ -361,5 +290,31 @@ def command_destroy(args: adsk.core.CommandEventArgs):
     # General logging for debug.
     futil.log(f"{CMD_NAME} Command Destroy Event")
 
-    global local_handlers
-    local_handlers = []
\ No newline at end of file
+    global local_handlers, session
+    local_handlers = []
+    ended_session = session
+
+    try:
+        # A settle preview arriving after the dialog closed is of no use.
+        preview_jobs.cancel_all()
+
+        if session:
+            scheduler = session.scheduler
+            futil.log(
+                '%s: %d validations, %d skipped; %d previews, %d reused the body transform; '
+                '%d full previews, %d coalesced, %d outlines',
+                args=(
+                    CMD_NAME, session.validations, session.validations_skipped, session.previews, session.previews_reused,
+                    scheduler.full, scheduler.coalesced, scheduler.outlines
+                )
+            )
+
+        # Write out the log messages buffered while the command was running.
+        futil.flush_log()
+    finally:
+        # Release the Fusion objects held by the session whatever happened above,
+        # nothing of the session may outlive the command.
+        if session:
+            session.release()
+        session = None
+        futil.end_session(CMD_NAME, ended_session)
@@ -0,0 +1,713 @@
+import time
+from contextlib import contextmanager
+
+import adsk.core
+import adsk.fusion
+from ...lib import fusionAddInUtils as futil
+from ...lib import reorientUtils as rutil
+from ... import config
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+# Number of occurrence writes between progress bar updates and timing reports.
+COMPENSATION_BATCH_SIZE = 250
+
+# Above this many occurrences a progress bar is shown while compensating.
+PROGRESS_BAR_THRESHOLD = 50
+
+# Planar face rankings per body, shared by every command of the add-in.
+face_ranking_cache = rutil.FaceRankingCache()
+
+# Measured face and body geometry keyed by entity token, invalidated when the
+# document changes, see start.
+geometry_cache = rutil.GeometryCache()
+
+# Occurrences of every component of the active design, built once and kept
+# across command sessions until the document changes, see start.
+occurrence_index = rutil.OccurrenceIndex()
+
+# Handlers of the document events, the pipeline is shared by the commands and
+# started by the first one used.
+local_handlers = []
+_subscriptions = []
+
+# Ids of the commands using the pipeline. They keep occurrence_index up to date
+# themselves, so it survives their termination.
+_own_commands = set()
+
+
+def start(command_id: str = None):
+    """Hooks the invalidation of the cached geometry and of the occurrence index
+    to the document events. Called by each command using the pipeline and by the
+    api entry points, only the first call hooks the events.
+
+    Arguments:
+    command_id -- The id of the calling command.
+    """
+    if command_id:
+        _own_commands.add(command_id)
+    if _subscriptions:
+        return
+
+    # Another document becoming active or closing makes the entity tokens moot.
+    # Every edit of the document, including undo and timeline changes, runs as a
+    # command, so a completed command means the cached geometry may be stale.
+    for event, callback in (
+            (app.documentActivated, document_changed),
+            (app.documentClosed, document_changed),
+            (ui.commandTerminated, command_terminated),
+    ):
+        _subscriptions.append((event, futil.add_handler(event, callback, local_handlers=local_handlers)))
+
+
+def stop():
+    """Removes the document event handlers and drops the cached geometry and
+    the occurrence index."""
+    for event, handler in _subscriptions:
+        event.remove(handler)
+    _subscriptions.clear()
+    _own_commands.clear()
+    local_handlers.clear()
+    invalidate_geometry()
+    occurrence_index.reset(None)
+
+
+def document_changed(args: adsk.core.DocumentEventArgs):
+    invalidate_geometry()
+    occurrence_index.reset(None)
+
+
+def command_terminated(args: adsk.core.ApplicationCommandEventArgs):
+    if args.terminationReason != adsk.core.CommandTerminationReason.CompletedTerminationReason:
+        return
+    invalidate_geometry()
+
+    # The Fusion API has no occurrence added or removed events, so any other
+    # command may have added, deleted or moved occurrences.
+    if args.commandId not in _own_commands:
+        occurrence_index.invalidate()
+
+
+@contextmanager
+def deferred_compute(design: adsk.fusion.Design):
+    """Defers the design compute for the duration of the with block so a series
+    of edits is solved once at the end instead of after every edit.
+
+    Does nothing when the running Fusion version does not expose the property.
+
+    Arguments:
+    design -- The design being edited.
+    """
+    if design is None or not hasattr(design, 'isComputeDeferred'):
+        yield
+        return
+
+    was_deferred = design.isComputeDeferred
+    design.isComputeDeferred = True
+    try:
+        yield
+    finally:
+        design.isComputeDeferred = was_deferred
+
+
+def face_frame(face: adsk.fusion.BRepFace) -> tuple:
+    """Returns the centroid and normal of a planar face as (x, y, z) tuples, in
+    the coordinate system of the component that owns the face.
+
+    Arguments:
+    face -- The planar face, native or proxy.
+    """
+    geometry = face_geometry(face)
+    return geometry.center, geometry.normal
+
+
+def face_geometry(face: adsk.fusion.BRepFace) -> rutil.FaceGeometry:
+    """Returns the centroid, normal and area of a planar face, in the coordinate
+    system of the component that owns the face.
+
+    The values are read from geometry_cache when the face was already measured in
+    the current version of the document.
+
+    Arguments:
+    face -- The planar face, native or proxy.
+    """
+    # The body is moved inside its component, so measure the native face rather
+    # than the proxy which is placed by the occurrence transform.
+    face = face.nativeObject or face
+    token = face.entityToken
+    geometry = geometry_cache.get(token)
+    if geometry is not None:
+        return geometry
+
+    face_evaluator = face.evaluator
+    face_center = face.centroid
+    (returnValue, face_normal) = face_evaluator.getNormalAtPoint(face_center)
+    futil.count_call('BRepFace.evaluate')
+    return geometry_cache.put(
+        token,
+        rutil.FaceGeometry(tuple(face_center.asArray()), tuple(face_normal.asArray()), face.area)
+    )
+
+
+def body_geometry(body: adsk.fusion.BRepBody) -> rutil.BodyGeometry:
+    """Returns the bounding box, vertices and center of mass of a body, in the
+    coordinate system of the component that owns the body.
+
+    The values are read from geometry_cache when the body was already measured in
+    the current version of the document.
+
+    Arguments:
+    body -- The body, native or proxy.
+    """
+    body = body.nativeObject or body
+    token = body.entityToken
+    geometry = geometry_cache.get(token)
+    if geometry is not None:
+        return geometry
+
+    bounding_box = body.boundingBox
+    points = tuple(tuple(vertex.geometry.asArray()) for vertex in body.vertices)
+    properties = body.getPhysicalProperties(adsk.fusion.CalculationAccuracy.LowCalculationAccuracy)
+    futil.count_call('BRepBody.measure')
+    return geometry_cache.put(
+        token,
+        rutil.BodyGeometry(
+            tuple(bounding_box.minPoint.asArray()),
+            tuple(bounding_box.maxPoint.asArray()),
+            points,
+            tuple(properties.centerOfMass.asArray())
+        )
+    )
+
+
+def invalidate_geometry():
+    """Drops the cached geometry, to be called whenever the document may have
+    changed or another document became active."""
+    geometry_cache.invalidate()
+
+
+def draw_outline(root_comp: adsk.fusion.Component, body: adsk.fusion.BRepBody, transform: tuple) -> adsk.fusion.CustomGraphicsGroup:
+    """Draws the bounding box of a body moved by a transform as custom graphics
+    lines, a cheap stand-in for the body in previews. Returns the custom graphics
+    group, the caller deletes it.
+
+    Arguments:
+    root_comp -- The component the graphics are drawn in.
+    body -- The body, native or proxy.
+    transform -- The transform applied to the body's bounding box, as a
+                 rutil.transform tuple.
+    """
+    geometry = body_geometry(body)
+    corners = rutil.transform.transform_points(transform, rutil.box_corners(geometry.min_point, geometry.max_point))
+
+    group = root_comp.customGraphicsGroups.add()
+    coordinates = adsk.fusion.CustomGraphicsCoordinates.create([value for corner in corners for value in corner])
+    group.addLines(coordinates, [index for edge in rutil.BOX_EDGES for index in edge], False)
+    return group
+
+
+def face_alignment(face: adsk.fusion.BRepFace) -> tuple:
+    """Returns the transform that puts the face's centroid at the origin with its
+    normal pointing down -Z, as a rutil.transform tuple.
+
+    Arguments:
+    face -- The planar face the component should rest on.
+    """
+    face_center, face_normal = face_frame(face)
+
+    # Translate the face's point to the origin, then rotate its normal onto -Z.
+    return rutil.transform.alignment(face_center, face_normal)
+
+
+def body_key(body: adsk.fusion.BRepBody) -> tuple:
+    """Returns a key identifying the geometry of a body.
+
+    Occurrences of the same component share the key since their proxies resolve to
+    the same native body, and the key changes when the body is modified.
+
+    Arguments:
+    body -- The body, native or proxy.
+    """
+    native_body = body.nativeObject or body
+    return (
+        native_body.entityToken,
+        native_body.faces.count,
+        round(native_body.area, 9),
+        round(native_body.volume, 9),
+    )
+
+
+def rank_body_faces(body: adsk.fusion.BRepBody) -> list:
+    """Ranks the planar faces of a body as lay flat candidates, best first.
+
+    Rankings are cached by body_key, so ranking the same body again, or another
+    occurrence of the same component, does not query the geometry.
+
+    Arguments:
+    body -- The body to rank the faces of.
+    """
+    key = body_key(body)
+    ranking = face_ranking_cache.get(key)
+    if ranking is not None:
+        return ranking
+
+    ranking = rutil.rank_faces(*ranking_input(body))
+    face_ranking_cache.put(key, ranking)
+    return ranking
+
+
+def ranking_input(body: adsk.fusion.BRepBody) -> tuple:
+    """Measures what rutil.rank_faces needs to rank the planar faces of a body.
+
+    Returns the (candidates, points, center_of_mass) arguments of rank_faces,
+    plain Python values that can be ranked away from the main thread.
+
+    Arguments:
+    body -- The body to rank the faces of.
+    """
+    # Measure everything on the native body so faces, vertices and the center of
+    # mass share the component coordinate system.
+    body = body.nativeObject or body
+
+    candidates = []
+    for index, face in enumerate(body.faces):
+        if face.geometry.surfaceType != adsk.core.SurfaceTypes.PlaneSurfaceType:
+            continue
+        geometry = face_geometry(face)
+        candidates.append(rutil.FaceCandidate(index, geometry.area, geometry.center, geometry.normal))
+
+    geometry = body_geometry(body)
+    return candidates, geometry.points, geometry.center_of_mass
+
+
+def rank_bodies(bodies, jobs: futil.BackgroundJobs):
+    """Ranks the planar faces of several bodies into face_ranking_cache, so the
+    following best_face calls on them do not query the geometry.
+
+    Each body is measured on the calling thread while the worker scores the
+    bodies measured before it. Returns once every ranking is cached.
+
+    Arguments:
+    bodies -- The bodies to rank the faces of.
+    jobs -- The background jobs scoring the faces.
+    """
+    pending = {}
+    for body in bodies:
+        key = body_key(body)
+        if key in pending or face_ranking_cache.get(key) is not None:
+            continue
+        pending[key] = jobs.submit(rutil.rank_faces, *ranking_input(body))
+
+    for key, job in pending.items():
+        face_ranking_cache.put(key, jobs.wait(job))
+
+
+def best_face(body: adsk.fusion.BRepBody) -> adsk.fusion.BRepFace:
+    """Returns the planar face the body should be laid flat on, or None when the
+    body has no planar face.
+
+    Arguments:
+    body -- The body, the returned face is in the same context as the body.
+    """
+    ranking = rank_body_faces(body)
+    if not ranking:
+        return None
+    return body.faces.item(ranking[0].index)
+
+
+def first_occurrence(component: adsk.fusion.Component) -> adsk.fusion.Occurrence:
+    """Returns the first occurrence of a component in its design, or None.
+
+    Arguments:
+    component -- The component.
+    """
+    occurrence_index.bind(component.parentDesign)
+    return occurrence_index.first(component)
+
+
+def validate_body(body: adsk.fusion.BRepBody, root_comp: adsk.fusion.Component) -> str:
+    """Checks that the component owning the body can be reoriented.
+
+    Returns an error message for the dialog, or an empty string when valid.
+
+    Arguments:
+    body -- The body the selected face belongs to.
+    root_comp -- The root component of the design.
+    """
+    if body.parentComponent == root_comp:
+        return 'ERROR: Cannot move root component.'
+    return ''
+
+
+def reorient_occurrence(
+        design: adsk.fusion.Design,
+        occurrence: adsk.fusion.Occurrence,
+        body_transform: tuple
+):
+    """Moves the contents of the occurrence's component by body_transform and
+    compensates every occurrence of the component so nothing moves in the
+    assembly.
+
+    Shortcut for planning the reorientation of a single occurrence and executing
+    the plan, see plan_reorientation and execute_plan.
+
+    Arguments:
+    design -- The design that owns the component.
+    occurrence -- The occurrence the face was selected in.
+    body_transform -- The transform to apply to the component's contents as a
+                      rutil.transform tuple.
+    """
+    plan = rutil.ExecutionPlan()
+    plan_reorientation(plan, design, occurrence, body_transform)
+    execute_plan(design, plan)
+
+
+def execute_plan(design: adsk.fusion.Design, plan: rutil.ExecutionPlan):
+    """Applies a plan in a single deferred compute scope, so the design is solved
+    once, and rolls every applied step back if one of them fails.
+
+    Arguments:
+    design -- The design the plan modifies.
+    plan -- The plan to execute.
+    """
+    start = time.perf_counter()
+    try:
+        plan.execute(deferred_compute(design))
+    except:
+        invalidate_geometry()
+        occurrence_index.invalidate()
+        futil.log(f'Reorientation failed after {plan.applied} of {len(plan)} steps, the applied steps were rolled back')
+        for description, error in plan.rollback_errors:
+            futil.log(f'Could not roll back "{description}": {error}', adsk.core.LogLevels.WarningLogLevel)
+        raise
+
+    # The bodies moved, the cached geometry no longer matches the document.
+    invalidate_geometry()
+    futil.log(f'Executed {len(plan)} reorientation steps in {(time.perf_counter() - start) * 1000:.1f} ms')
+
+
+def plan_reorientation(
+        plan: rutil.ExecutionPlan,
+        design: adsk.fusion.Design,
+        occurrence: adsk.fusion.Occurrence,
+        body_transform: tuple
+):
+    """Adds the steps reorienting one occurrence to a plan.
+
+    All the bodies of the component are moved by a single MoveFeature and the
+    child occurrences of a sub-assembly are moved along with them in one batched
+    pass, so the cost is one timeline feature per component. Every occurrence of
+    the component, taken from occurrence_index, is then compensated in one
+    batched pass.
+
+    Arguments:
+    plan -- The plan the steps are added to.
+    design -- The design that owns the component.
+    occurrence -- The occurrence the face was selected in.
+    body_transform -- The transform to apply to the component's contents as a
+                      rutil.transform tuple.
+    """
+    # Remove the drift of the composed transform and skip moves too small to
+    # matter, they would only add timeline features and recomputes.
+    tolerance = config.TRANSFORM_TOLERANCE
+    body_transform = rutil.transform.clean(body_transform, tolerance)
+    if rutil.transform.is_identity(body_transform, tolerance):
+        futil.log('Skipped a reorientation below the transform tolerance')
+        return
+
+    root_comp = design.rootComponent
+    component = occurrence.component
+    occurrence_index.bind(design)
+    initial = {}
+
+    def unground():
+        grounded = (occurrence.isGrounded, occurrence.isGroundToParent)
+        occurrence.isGrounded = False
+        occurrence.isGroundToParent = False
+        return grounded
+
+    def reground(grounded):
+        occurrence.isGrounded, occurrence.isGroundToParent = grounded
+
+    # The bodies are moved with the occurrence at identity so the body transform,
+    # computed in component space, can be used as is.
+    def reset_transform():
+        initial['transform'] = occurrence.transform2
+        set_transform(occurrence, adsk.core.Matrix3D.create())
+        return initial['transform']
+
+    plan.add('Unground occurrence', unground, reground)
+    plan.add('Reset occurrence transform', reset_transform, lambda transform: set_transform(occurrence, transform))
+
+    plan.add(
+        'Move bodies',
+        lambda: move_bodies(root_comp, occurrence, body_transform),
+        lambda feature: feature.deleteMe() if feature else None
+    )
+
+    # Child occurrences are placed relative to the component, move them with
+    # the bodies.
+    plan.add(
+        'Move child occurrences',
+        lambda: move_occurrences(component.occurrences, body_transform),
+        restore_transforms
+    )
+
+    plan.add(
+        'Restore occurrence transform',
+        lambda: set_transform(occurrence, initial['transform']),
+        lambda _: set_transform(occurrence, adsk.core.Matrix3D.create())
+    )
+
+    # get the inverse of body's transform (IBT)
+    inverse_body_transform = rutil.transform.invert(body_transform)
+
+    # apply the inverse of body's transform to all occurrences referencing component
+    # post-multiply. get local transformation in global form
+    plan.add(
+        'Compensate occurrences',
+        lambda: compensate_occurrences(occurrence_index.occurrences(component), inverse_body_transform),
+        restore_transforms
+    )
+
+
+def plan_record(
+        occurrence: adsk.fusion.Occurrence,
+        face: adsk.fusion.BRepFace,
+        body_transform: tuple,
+        triad: tuple = rutil.transform.IDENTITY
+) -> rutil.PlanRecord:
+    """Describes a reorientation for a plan file, see rutil.write_plan.
+
+    Arguments:
+    occurrence -- The occurrence that is reoriented.
+    face -- The face the component is laid on.
+    body_transform -- The transform applied to the component's contents.
+    triad -- The part of body_transform coming from the triad.
+    """
+    component = occurrence.component
+    native_face = face.nativeObject or face
+    return rutil.PlanRecord(component.id, component.name, native_face.entityToken, body_transform, triad)
+
+
+def ask_plan_file(save: bool) -> str:
+    """Asks for a plan file to save or open, returns an empty string when
+    cancelled.
+
+    Arguments:
+    save -- True to ask for a file to save, False for one to open.
+    """
+    dialog = ui.createFileDialog()
+    dialog.title = 'Save Reorientation Plan' if save else 'Open Reorientation Plan'
+    dialog.filter = 'Reorientation plan (*.json);;Binary reorientation plan (*.bin)'
+    result = dialog.showSave() if save else dialog.showOpen()
+    return dialog.filename if result == adsk.core.DialogResults.DialogOK else ''
+
+
+def plan_replay(plan: rutil.ExecutionPlan, design: adsk.fusion.Design, records) -> dict:
+    """Adds the steps replaying stored plan records to a plan. The stored
+    transforms are used as they are, no face is evaluated.
+
+    Returns a dictionary mapping each component name to an empty string when its
+    steps were added, or to the reason it was skipped.
+
+    Arguments:
+    plan -- The plan the steps are added to.
+    design -- The design to apply the records to.
+    records -- Iterable of rutil.PlanRecord.
+    """
+    # One pass over the components, matched by id and then by name.
+    components_by_id = {}
+    components_by_name = {}
+    for component in design.allComponents:
+        components_by_id[component.id] = component
+        components_by_name.setdefault(component.name, component)
+
+    results = {}
+    for record in records:
+        component = components_by_id.get(record.component_id) or components_by_name.get(record.component_name)
+        occurrence = first_occurrence(component) if component else None
+        if not occurrence:
+            results[record.component_name] = 'ERROR: Component not found in the design.'
+            continue
+        plan_reorientation(plan, design, occurrence, tuple(record.transform))
+        results[record.component_name] = ''
+    return results
+
+
+def set_transform(occurrence: adsk.fusion.Occurrence, transform: adsk.core.Matrix3D):
+    """Writes the transform of an occurrence."""
+    occurrence.transform2 = transform
+    futil.count_call('Occurrence.transform2')
+
+
+def restore_transforms(previous: list):
+    """Writes back the transforms returned by move_occurrences or
+    compensate_occurrences.
+
+    Arguments:
+    previous -- List of (occurrence, Matrix3D) pairs.
+    """
+    for occ, transform in previous:
+        occ.transform2 = transform
+    futil.count_call('Occurrence.transform2', len(previous))
+
+
+def move_bodies(
+        root_comp: adsk.fusion.Component,
+        occurrence: adsk.fusion.Occurrence,
+        transform: tuple
+) -> adsk.fusion.MoveFeature:
+    """Moves every body of the occurrence with a single MoveFeature.
+
+    Returns the MoveFeature, or None when the component has no body.
+
+    Arguments:
+    root_comp -- The root component the feature is created in.
+    occurrence -- The occurrence whose bodies are moved.
+    transform -- The move as a rutil.transform tuple.
+    """
+    bodies = occurrence.bRepBodies
+    if not bodies.count:
+        return None
+
+    body_collection = adsk.core.ObjectCollection.create()
+    for body in bodies:
+        body_collection.add(body)
+    moveFeats = root_comp.features.moveFeatures
+    moveFeatureInput = moveFeats.createInput2(body_collection)
+    moveFeatureInput.defineAsFreeMove(rutil.transform.to_matrix3d(transform))
+    futil.count_call('MoveFeatures.add')
+    return moveFeats.add(moveFeatureInput)
+
+
+def move_occurrences(occurrences: adsk.fusion.OccurrenceList, transform: tuple) -> list:
+    """Pre-multiplies the transform of every occurrence by transform, moving the
+    occurrences within their parent component.
+
+    Occurrences whose transform changes by less than config.TRANSFORM_TOLERANCE
+    are not written. Returns the previous transforms of the written occurrences
+    as (occurrence, Matrix3D) pairs. If a write fails, the occurrences already
+    written are restored before the error is re-raised.
+
+    Arguments:
+    occurrences -- The occurrences to move.
+    transform -- The transform as a rutil.transform tuple.
+    """
+    occs = [occurrences.item(i) for i in range(occurrences.count)]
+    previous = [(occ, occ.transform2) for occ in occs]
+    current = [rutil.transform.from_matrix3d(matrix) for _, matrix in previous]
+    transforms = rutil.transform.transform_all_by(current, transform)
+    changed = changed_transforms(current, transforms)
+
+    written = []
+    try:
+        for i in changed:
+            occs[i].transform2 = rutil.transform.to_matrix3d(transforms[i])
+            written.append(previous[i])
+    except:
+        restore_written(written)
+        raise
+    finally:
+        futil.count_call('Occurrence.transform2', len(written))
+    return written
+
+
+def restore_written(previous: list):
+    """Restores the occurrences a step wrote before one of its writes failed.
+
+    The plan only undoes the steps that completed, so a step writing many
+    occurrences puts back its own partial writes. A failure here is logged
+    rather than raised so it does not hide the original error.
+
+    Arguments:
+    previous -- List of (occurrence, Matrix3D) pairs of the written occurrences.
+    """
+    try:
+        restore_transforms(previous)
+    except Exception as error:
+        futil.log(f'Could not restore {len(previous)} occurrence transforms: {error!r}', adsk.core.LogLevels.WarningLogLevel)
+
+
+def changed_transforms(current: list, transforms: list) -> list:
+    """Cleans the new transforms in place, see rutil.transform.clean, and returns
+    the indices of those that differ from the current ones by more than
+    config.TRANSFORM_TOLERANCE.
+
+    Arguments:
+    current -- The current transforms.
+    transforms -- The new transforms, same length as current.
+    """
+    tolerance = config.TRANSFORM_TOLERANCE
+    changed = []
+    for i, (old, new) in enumerate(zip(current, transforms)):
+        transforms[i] = new = rutil.transform.clean(new, tolerance)
+        if not rutil.transform.is_equal(old, new, tolerance):
+            changed.append(i)
+    return changed
+
+
+def compensate_occurrences(occurrences: list, inverse_body_transform: tuple) -> list:
+    """Post-multiplies the transform of every occurrence by the inverse of the
+    body transform so the moved body stays where it was in the assembly.
+
+    The current transforms are read from the occurrences and all the new ones
+    are computed in one pass before anything is written. Occurrences whose
+    transform changes by less than config.TRANSFORM_TOLERANCE are not written.
+    Returns the previous transforms of the written occurrences as
+    (occurrence, Matrix3D) pairs. If a write fails, the occurrences already
+    written are restored before the error is re-raised.
+
+    Arguments:
+    occurrences -- The occurrences referencing the component that was moved.
+    inverse_body_transform -- The inverse of the body transform as a
+                              rutil.transform tuple.
+    """
+    start = time.perf_counter()
+
+    matrices = [occ.transform2 for occ in occurrences]
+    current = [rutil.transform.from_matrix3d(matrix) for matrix in matrices]
+    transforms = rutil.transform.transform_many(current, inverse_body_transform)
+    changed = changed_transforms(current, transforms)
+
+    occs = [occurrences[i] for i in changed]
+    previous = [(occurrences[i], matrices[i]) for i in changed]
+    transforms = [transforms[i] for i in changed]
+
+    compute_time = time.perf_counter() - start
+    futil.log(
+        f'Computed {len(current)} occurrence transforms in {compute_time * 1000:.1f} ms, '
+        f'{len(current) - len(changed)} unchanged'
+    )
+
+    progress_bar = ui.progressBar if len(occs) > PROGRESS_BAR_THRESHOLD else None
+    if progress_bar:
+        progress_bar.show('Reorienting occurrences %v of %m', 0, len(occs))
+
+    written = 0
+    try:
+        for batch_start in range(0, len(occs), COMPENSATION_BATCH_SIZE):
+            batch_end = min(batch_start + COMPENSATION_BATCH_SIZE, len(occs))
+            batch_time = time.perf_counter()
+
+            for i in range(batch_start, batch_end):
+                occs[i].transform2 = rutil.transform.to_matrix3d(transforms[i])
+                written = i + 1
+            futil.count_call('Occurrence.transform2', batch_end - batch_start)
+
+            if progress_bar:
+                progress_bar.progressValue = batch_end
+            futil.log(
+                'Compensated occurrences %d-%d in %.1f ms',
+                args=(batch_start, batch_end - 1, (time.perf_counter() - batch_time) * 1000)
+            )
+    except:
+        restore_written(previous[:written])
+        raise
+    finally:
+        if progress_bar:
+            progress_bar.hide()
+
+    futil.log(f'Compensated {len(occs)} occurrences in {(time.perf_counter() - start) * 1000:.1f} ms')
+    return previous
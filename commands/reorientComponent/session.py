@@ -0,0 +1,155 @@
+import adsk.core
+import adsk.fusion
+from ...lib import reorientUtils as rutil
+
+
+class ReorientSession:
+    """State of one run of the reorient command, from command_created to
+    command_destroy.
+
+    The handlers update the selection through select_face and the triad through
+    set_triad, which only flag what has to be recomputed; alignment and
+    update_body_transform then recompute the matrices lazily.
+
+    Validation verdicts are memoized per component, and the counters record how
+    much work the dirty tracking saved over the session. The scheduler decides
+    how each preview of a triad drag is rendered.
+    """
+
+    __slots__ = (
+        '__weakref__',
+        'design',
+        'command',
+        'scheduler',
+        'preview_matrix',
+        'outline',
+        'face',
+        'body',
+        'occurrence',
+        'is_valid',
+        'triad_matrix',
+        'base_alignment',
+        'body_transform',
+        'alignment_dirty',
+        'transform_dirty',
+        'verdicts',
+        'validations',
+        'validations_skipped',
+        'previews',
+        'previews_reused',
+    )
+
+    def __init__(self, design: adsk.fusion.Design, command: adsk.core.Command = None, scheduler: rutil.PreviewScheduler = None):
+        self.design = design
+        self.command = command
+        self.scheduler = scheduler or rutil.PreviewScheduler()
+        self.preview_matrix = None
+        self.outline = None
+        self.face = None
+        self.body = None
+        self.occurrence = None
+        self.is_valid = False
+        self.triad_matrix = rutil.transform.identity()
+        self.base_alignment = None
+        self.body_transform = rutil.transform.identity()
+        self.alignment_dirty = False
+        self.transform_dirty = False
+        self.verdicts = {}
+        self.validations = 0
+        self.validations_skipped = 0
+        self.previews = 0
+        self.previews_reused = 0
+
+    def select_face(self, face: adsk.fusion.BRepFace, occurrence: adsk.fusion.Occurrence = None) -> bool:
+        """Records the selected face, or None when the selection was cleared.
+
+        Returns False when the face is already the selected one, so the caller
+        can skip the work depending on the selection.
+
+        Arguments:
+        face -- The selected face.
+        occurrence -- The occurrence the face was selected in.
+        """
+        if face is None:
+            changed = self.face is not None
+            self.face = None
+            self.body = None
+            self.occurrence = None
+            self.is_valid = False
+            self.base_alignment = None
+            self.body_transform = rutil.transform.identity()
+            self.alignment_dirty = self.transform_dirty = False
+            return changed
+
+        if self.face is not None and self.face == face:
+            return False
+
+        self.face = face
+        self.body = face.body
+        self.occurrence = occurrence
+        self.base_alignment = None
+        self.alignment_dirty = self.transform_dirty = True
+        return True
+
+    def set_triad(self, triad_matrix: tuple):
+        """Records the triad transform as a rutil.transform tuple."""
+        if triad_matrix != self.triad_matrix:
+            self.triad_matrix = triad_matrix
+            self.transform_dirty = True
+
+    def validate(self, validate) -> str:
+        """Returns the verdict for the component of the selected body, calling
+        validate(body) only for the first body selected in each component.
+
+        Arguments:
+        validate -- Callable taking the body and returning an error message, or
+                    an empty string when the body is valid.
+        """
+        key = rutil.component_key(self.body.parentComponent)
+        verdict = self.verdicts.get(key)
+        if verdict is not None:
+            self.validations_skipped += 1
+            return verdict
+
+        self.validations += 1
+        verdict = self.verdicts[key] = validate(self.body)
+        return verdict
+
+    @property
+    def is_dirty(self) -> bool:
+        """True when the body transform has to be recomputed."""
+        return self.alignment_dirty or self.transform_dirty or self.base_alignment is None
+
+    def alignment(self, compute) -> tuple:
+        """Returns the base alignment of the selected face, calling compute(face)
+        only when the face changed since the last call."""
+        if self.alignment_dirty or self.base_alignment is None:
+            self.base_alignment = compute(self.face)
+            self.alignment_dirty = False
+            self.transform_dirty = True
+        return self.base_alignment
+
+    def update_body_transform(self, compute_alignment) -> tuple:
+        """Returns the body transform, the base alignment followed by the triad,
+        recomputing it only when the face or the triad changed."""
+        base_alignment = self.alignment(compute_alignment)
+        if self.transform_dirty:
+            self.body_transform = rutil.transform.transform_by(base_alignment, self.triad_matrix)
+            self.transform_dirty = False
+        return self.body_transform
+
+    def clear_outline(self):
+        """Deletes the outline drawn by the last preview, if any."""
+        if self.outline is not None:
+            if self.outline.isValid:
+                self.outline.deleteMe()
+            self.outline = None
+
+    def release(self):
+        """Drops every reference to Fusion objects held by the session."""
+        self.clear_outline()
+        self.design = None
+        self.command = None
+        self.preview_matrix = None
+        self.select_face(None)
+        self.verdicts.clear()
@@ -10,6 +10,36 @@ import os
 # are ready to distribute it.
 DEBUG = True
 
+# Flag that enables the collection of event handler timings and API call counters.
+# The report is written next to this file when the add-in is stopped. Leave it
+# False for normal use, profiling adds a small cost to every event.
+PROFILE = False
+
+# Flag that enables the recording of the Python heap, the live event handlers and
+# the Fusion objects of every command session, see the diagnostics command. It
+# turns tracemalloc on, which slows the add-in down, so leave it False for
+# normal use.
+DIAGNOSTICS = False
+
+# Transforms closer than this to each other are treated as equal. Moves and
+# occurrence writes smaller than this are skipped, and rotations this close to
+# being axis aligned are snapped. Lengths are in centimeters, Fusion's internal
+# unit.
+TRANSFORM_TOLERANCE = 1e-7
+
+# Full previews per second while the triad of the reorient command is dragged,
+# the previews in between show the last rendered state again. 0 renders every
+# preview in full.
+PREVIEW_MAX_RATE = 15
+
+# Default of the dialog's Fast Preview option: drags only show the bounding box
+# of the body, the body itself is moved once the triad stops.
+PREVIEW_LOW_FIDELITY = False
+
+# Seconds the triad has to stay still for a drag to count as released, the
+# latest state is then rendered in full.
+PREVIEW_SETTLE_TIME = 0.15
+
 # Gets the name of the add-in from the name of the folder the py file is in.
 # This is used when defining unique internal names for various UI elements 
 # that need a unique name. It's also recommended to use a company name as 
@@ -1,2 +1,5 @@
 from .general_utils import *
 from .event_utils import *
+from .profiling_utils import *
+from .job_utils import *
+from .diagnostics_utils import *
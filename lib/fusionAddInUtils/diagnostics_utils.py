@@ -0,0 +1,217 @@
+import gc
+import itertools
+import time
+import tracemalloc
+import weakref
+from collections import Counter, deque
+
+import adsk.core
+
+# Attempt to read DIAGNOSTICS flag from parent config.
+try:
+    from ... import config
+    _enabled = config.DIAGNOSTICS
+except:
+    _enabled = False
+
+# Number of finished command sessions kept for the report.
+MAX_SESSIONS = 20
+
+# Number of allocation sites listed in the heap report.
+TOP_ALLOCATIONS = 10
+
+# Every handler created by add_handler, and a serial number per handler so the
+# handlers created during a command session can be told apart.
+_handlers = weakref.WeakSet()
+_handler_serials = itertools.count(1)
+
+_open_sessions = {}
+_sessions = deque(maxlen=MAX_SESSIONS)
+_started_tracing = False
+
+
+class SessionRecord:
+    """Memory use of one command session, from begin_session to end_session.
+
+    The handlers created during the session and the objects passed to
+    end_session are held weakly, so retained_handlers and retained_objects
+    report what is still alive when they are read, typically some time after the
+    session ended.
+    """
+
+    def __init__(self, name: str, module: str):
+        self.name = name
+        self.module = module
+        self.start_time = time.time()
+        self.seconds = 0.0
+        self.first_handler = next(_handler_serials)
+        self.last_handler = None
+        self.heap_start = _traced_memory()[0]
+        self.heap_delta = 0
+        self.heap_peak = 0
+        self.api_objects_start = sum(api_object_counts().values())
+        self.api_objects_delta = 0
+        self._objects = []
+
+    @property
+    def retained_handlers(self) -> int:
+        """Number of handlers created by the command's module during the session
+        that are still alive."""
+        return sum(
+            1 for handler in list(_handlers)
+            if handler._diagnostics_owner == self.module
+            and self.first_handler <= handler._diagnostics_serial <= (self.last_handler or float('inf'))
+        )
+
+    @property
+    def retained_objects(self) -> int:
+        """Number of the objects passed to end_session that are still alive."""
+        return sum(1 for ref in self._objects if ref() is not None)
+
+    def as_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'seconds': self.seconds,
+            'heap_delta': self.heap_delta,
+            'heap_peak': self.heap_peak,
+            'api_objects_delta': self.api_objects_delta,
+            'retained_handlers': self.retained_handlers,
+            'retained_objects': self.retained_objects,
+        }
+
+
+def enable_diagnostics(enabled: bool = True):
+    """Turns the recording of command sessions on or off.
+
+    Enabling starts tracemalloc unless it is already tracing, disabling stops it
+    again if it was started here. When disabled begin_session and end_session
+    return after checking a single flag.
+    """
+    global _enabled, _started_tracing
+    _enabled = enabled
+    if enabled and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracing = True
+    elif not enabled and _started_tracing:
+        tracemalloc.stop()
+        _started_tracing = False
+    if not enabled:
+        _open_sessions.clear()
+
+
+def is_diagnosing() -> bool:
+    """Returns True if command sessions are recorded."""
+    return _enabled
+
+
+def track_handler(handler, callback):
+    """Registers a handler created by add_handler, so live_handlers can count it.
+
+    Arguments:
+    handler -- The handler.
+    callback -- The function the handler calls, its module owns the handler.
+    """
+    handler._diagnostics_owner = getattr(callback, '__module__', None) or '?'
+    handler._diagnostics_serial = next(_handler_serials)
+    _handlers.add(handler)
+
+
+def live_handlers() -> dict:
+    """Returns the number of handlers still alive per module owning them."""
+    return dict(Counter(handler._diagnostics_owner for handler in list(_handlers)))
+
+
+def api_object_counts() -> dict:
+    """Returns the number of live Fusion API objects per type, as seen by the
+    Python garbage collector."""
+    base = adsk.core.Base
+    return dict(Counter(type(obj).__name__ for obj in gc.get_objects() if isinstance(obj, base)))
+
+
+def begin_session(name: str, module: str):
+    """Starts recording a command session, call from command_created.
+
+    Arguments:
+    name -- The name of the command.
+    module -- The name of the module whose handlers belong to the session,
+              usually __name__ of the command's entry module.
+    """
+    if not _enabled:
+        return
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    _open_sessions[name] = SessionRecord(name, module)
+
+
+def end_session(name: str, *objects):
+    """Ends the recording of a command session, call from command_destroy once
+    the session released its references.
+
+    Arguments:
+    name -- The name of the command.
+    objects -- Objects that should be released with the session. They are held
+               weakly and reported by retained_objects while still alive.
+    """
+    record = _open_sessions.pop(name, None)
+    if record is None:
+        return
+
+    gc.collect()
+    current, peak = _traced_memory()
+    record.seconds = time.time() - record.start_time
+    record.last_handler = next(_handler_serials)
+    record.heap_delta = current - record.heap_start
+    record.heap_peak = peak - record.heap_start
+    record.api_objects_delta = sum(api_object_counts().values()) - record.api_objects_start
+    for obj in objects:
+        try:
+            record._objects.append(weakref.ref(obj))
+        except TypeError:
+            pass
+    _sessions.append(record)
+
+
+def session_records() -> list:
+    """Returns the SessionRecords of the last finished sessions, oldest first."""
+    return list(_sessions)
+
+
+def diagnostics_report() -> str:
+    """Returns the live handlers, the live API objects, the Python heap and the
+    recorded sessions as text."""
+    gc.collect()
+    lines = ['Live handlers:']
+    lines.extend(f'  {module}: {count}' for module, count in sorted(live_handlers().items()))
+
+    api_objects = api_object_counts()
+    lines.append(f'Live API objects: {sum(api_objects.values())}')
+    lines.extend(
+        f'  {type_name}: {count}'
+        for type_name, count in sorted(api_objects.items(), key=lambda item: -item[1])[:TOP_ALLOCATIONS]
+    )
+
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        lines.append(f'Python heap: {current / 1024:.1f} KB, peak {peak / 1024:.1f} KB')
+        for stat in tracemalloc.take_snapshot().statistics('lineno')[:TOP_ALLOCATIONS]:
+            lines.append(f'  {stat.size / 1024:.1f} KB in {stat.count} blocks at {stat.traceback}')
+    else:
+        lines.append('Python heap: not traced')
+
+    lines.append(f'Sessions: {len(_sessions)}')
+    for record in _sessions:
+        lines.append(
+            f'  {record.name}: {record.seconds:.1f} s, heap {record.heap_delta / 1024:+.1f} KB '
+            f'(peak {record.heap_peak / 1024:.1f} KB), API objects {record.api_objects_delta:+d}, '
+            f'retained {record.retained_handlers} handlers and {record.retained_objects} objects'
+        )
+    return '\n'.join(lines)
+
+
+def _traced_memory() -> tuple:
+    return tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+
+
+# Start tracing right away when enabled in the configuration.
+if _enabled:
+    enable_diagnostics()
@@ -10,10 +10,13 @@
 #  UNINTERRUPTED OR ERROR FREE.
 
 import sys
+import time
 from typing import Callable
 
 import adsk.core
 from .general_utils import handle_error
+from . import profiling_utils
+from . import diagnostics_utils
 
 
 # Global Variable to hold Event Handlers
@@ -68,11 +71,15 @@ def _create_handler(
         local_handlers: list = None
 ):
     handler = _define_handler(handler_type, callback, name)()
+    diagnostics_utils.track_handler(handler, callback)
     (local_handlers if local_handlers is not None else _handlers).append(handler)
     return handler
 
 
 def _define_handler(handler_type, callback, name: str = None):
+    # Handlers of different events share a handler type, so timings are recorded
+    # under the name of the callback unless a name is given.
+    profile_name = name or f'{callback.__module__}.{getattr(callback, "__qualname__", handler_type.__name__)}'
     name = name or handler_type.__name__
 
     class Handler(handler_type):
@@ -80,9 +87,12 @@ def _define_handler(handler_type, callback, name: str = None):
             super().__init__()
 
         def notify(self, args):
+            start = time.perf_counter() if profiling_utils.is_profiling() else None
             try:
                 callback(args)
             except:
                 handle_error(name)
+            if start is not None:
+                profiling_utils.record_time(profile_name, time.perf_counter() - start)
 
     return Handler
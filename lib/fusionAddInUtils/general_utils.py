@@ -10,11 +10,14 @@
 #  UNINTERRUPTED OR ERROR FREE.
 
 import os
+import time
 import traceback
+from collections import deque
 import adsk.core
 
-app = adsk.core.Application.get()
-ui = app.userInterface
+# The application is looked up on first use rather than at import, so importing
+# the utilities costs nothing at Fusion startup.
+_app = None
 
 # Attempt to read DEBUG flag from parent config.
 try:
@@ -23,27 +26,122 @@ try:
 except:
     DEBUG = False
 
+# Number of messages held before the buffer is written out. Messages are also
+# written when an error or a force_console message is logged and when flush_log is
+# called, e.g. when a command is destroyed. Set to 1 to write every message immediately.
+LOG_BUFFER_SIZE = 256
 
-def log(message: str, level: adsk.core.LogLevels = adsk.core.LogLevels.InfoLogLevel, force_console: bool = False):
+# Each distinct message is written at most LOG_RATE_LIMIT times per
+# LOG_RATE_WINDOW seconds, further repeats are counted and reported once.
+LOG_RATE_LIMIT = 20
+LOG_RATE_WINDOW = 1.0
+
+_LEVEL_RANKS = {
+    adsk.core.LogLevels.InfoLogLevel: 0,
+    adsk.core.LogLevels.WarningLogLevel: 1,
+    adsk.core.LogLevels.ErrorLogLevel: 2,
+}
+
+# Messages below this level are dropped before they are formatted.
+_log_rank = _LEVEL_RANKS[adsk.core.LogLevels.InfoLogLevel if DEBUG else adsk.core.LogLevels.WarningLogLevel]
+
+_log_buffer = deque()
+_rate_state = {}
+
+
+def set_log_level(level: adsk.core.LogLevels):
+    """Sets the lowest level of the messages that are logged.
+
+    Arguments:
+    level -- Messages below this level are dropped before being formatted.
+    """
+    global _log_rank
+    _log_rank = _LEVEL_RANKS[level]
+
+
+def log(message, level: adsk.core.LogLevels = adsk.core.LogLevels.InfoLogLevel, force_console: bool = False, args: tuple = ()):
     """Utility function to easily handle logging in your app.
 
+    Messages are buffered and formatted when the buffer is written, so messages
+    that are filtered out or rate limited cost next to nothing. Use args or a
+    callable to defer expensive formatting.
+
     Arguments:
-    message -- The message to log.
+    message -- The message to log. Either a string, formatted with % and args if
+               args are given, or a callable returning the message.
     level -- The logging severity level.
     force_console -- Forces the message to be written to the Text Command window. 
+    args -- Values formatted into the message with the % operator.
     """    
+    is_error = level == adsk.core.LogLevels.ErrorLogLevel
+    if not (is_error or force_console) and _LEVEL_RANKS.get(level, 0) < _log_rank:
+        return
+
+    if not is_error and _is_rate_limited(message):
+        return
+
+    _log_buffer.append((message, args, level, force_console))
+    if is_error or force_console or len(_log_buffer) >= LOG_BUFFER_SIZE:
+        flush_log()
+
+
+def flush_log():
+    """Formats and writes every buffered message."""
+    while _log_buffer:
+        message, args, level, force_console = _log_buffer.popleft()
+        if callable(message):
+            message = message()
+        elif args:
+            message = message % args
+        _write_log(message, level, force_console)
+
+    # Report the repeats that were dropped since the last flush.
+    for key, (window_start, count, suppressed) in _rate_state.items():
+        if suppressed:
+            _write_log(f'{_describe(key)} (repeated {suppressed} more times)', adsk.core.LogLevels.InfoLogLevel, False)
+    _rate_state.clear()
+
+
+def _write_log(message: str, level: adsk.core.LogLevels, force_console: bool):
     # Always print to console, only seen through IDE.
     print(message)  
 
     # Log all errors to Fusion log file.
     if level == adsk.core.LogLevels.ErrorLogLevel:
         log_type = adsk.core.LogTypes.FileLogType
-        app.log(message, level, log_type)
+        get_app().log(message, level, log_type)
 
     # If config.DEBUG is True write all log messages to the console.
     if DEBUG or force_console:
         log_type = adsk.core.LogTypes.ConsoleLogType
-        app.log(message, level, log_type)
+        get_app().log(message, level, log_type)
+
+
+def _is_rate_limited(message) -> bool:
+    # Repeats are keyed by the unformatted message, or the code of a callable.
+    key = message if isinstance(message, str) else getattr(message, '__code__', message)
+    now = time.monotonic()
+
+    state = _rate_state.get(key)
+    if state is None or now - state[0] >= LOG_RATE_WINDOW:
+        if state and state[2]:
+            _log_buffer.append((f'{_describe(key)} (repeated {state[2]} more times)', (), adsk.core.LogLevels.InfoLogLevel, False))
+        _rate_state[key] = [now, 1, 0]
+        return False
+
+    if state[1] < LOG_RATE_LIMIT:
+        state[1] += 1
+        return False
+
+    state[2] += 1
+    return True
+
+
+def _describe(key) -> str:
+    if isinstance(key, str):
+        return key
+    code = getattr(key, 'co_filename', None)
+    return f'Message from {os.path.basename(code)}:{key.co_firstlineno}' if code else repr(key)
 
 
 def handle_error(name: str, show_message_box: bool = False):
@@ -61,4 +159,12 @@ def handle_error(name: str, show_message_box: bool = False):
 
     # If desired you could show an error as a message box.
     if show_message_box:
-        ui.messageBox(f'{name}\n{traceback.format_exc()}')
+        get_app().userInterface.messageBox(f'{name}\n{traceback.format_exc()}')
+
+
+def get_app() -> adsk.core.Application:
+    """Returns the Fusion application, looked up on the first call."""
+    global _app
+    if _app is None:
+        _app = adsk.core.Application.get()
+    return _app
@@ -0,0 +1,173 @@
+import itertools
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from typing import Callable
+
+import adsk.core
+from .general_utils import log
+from .event_utils import add_handler
+
+
+class BackgroundJob:
+    """Handle of a job submitted to BackgroundJobs."""
+
+    def __init__(self, job_id: int, on_done: Callable, on_error: Callable):
+        self.id = job_id
+        self.on_done = on_done
+        self.on_error = on_error
+        self.future = None
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Cancels the job. A job that already started runs to the end but its
+        result is dropped and no callback is called."""
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+
+class BackgroundJobs:
+    """Runs pure Python work in a worker thread and hands the results back to
+    the main thread.
+
+    The work must not touch the Fusion API, which can only be used from the main
+    thread. When a job finishes the worker fires a custom event, and the result is
+    passed to the job's callbacks from that event's handler, on the main thread.
+
+    Arguments:
+    event_id -- Id of the custom event used to signal finished jobs, unique in
+                Fusion.
+    max_workers -- Number of worker threads.
+    """
+
+    def __init__(self, event_id: str, max_workers: int = 1):
+        self.event_id = event_id
+        self.max_workers = max_workers
+        self._executor = None
+        self._event = None
+        self._handlers = []
+        self._jobs = {}
+        self._finished = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def start(self):
+        """Registers the custom event, call from the add-in's start."""
+        if self._event is not None:
+            return
+        app = adsk.core.Application.get()
+        self._event = app.registerCustomEvent(self.event_id)
+        add_handler(self._event, self._dispatch, name=self.event_id, local_handlers=self._handlers)
+
+    def stop(self):
+        """Cancels every job, stops the worker and unregisters the custom event,
+        call from the add-in's stop."""
+        self.cancel_all()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._event is not None:
+            for handler in self._handlers:
+                self._event.remove(handler)
+            adsk.core.Application.get().unregisterCustomEvent(self.event_id)
+            self._event = None
+        self._handlers = []
+
+    def submit(self, work: Callable, *args, on_done: Callable = None, on_error: Callable = None) -> BackgroundJob:
+        """Runs work(*args) in the worker thread.
+
+        Arguments:
+        work -- The callable to run, it must not use the Fusion API.
+        args -- Arguments passed to work.
+        on_done -- Called on the main thread with the return value of work.
+        on_error -- Called on the main thread with the exception raised by work.
+                    When not given the exception is logged.
+        """
+        if self._event is None:
+            raise RuntimeError(f'Background jobs "{self.event_id}" are not started.')
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix=self.event_id)
+
+        job = BackgroundJob(next(self._ids), on_done, on_error)
+        with self._lock:
+            self._jobs[job.id] = job
+        job.future = self._executor.submit(self._run, job, work, args)
+        return job
+
+    def wait(self, job: BackgroundJob, timeout: float = None):
+        """Blocks until a job finished and returns the return value of its work,
+        re-raising the exception it raised. The job's callbacks are not called.
+
+        For work whose result is needed before the calling handler returns, e.g.
+        inside a command's execute where the custom event cannot be dispatched.
+
+        Arguments:
+        job -- A job returned by submit.
+        timeout -- Seconds to wait at most, None to wait until the job finished.
+        """
+        outcome = job.future.result(timeout)
+        with self._lock:
+            self._jobs.pop(job.id, None)
+            self._finished.pop(job.id, None)
+        if outcome is None:
+            raise CancelledError()
+
+        succeeded, value = outcome
+        if not succeeded:
+            raise value
+        return value
+
+    def cancel_all(self):
+        """Cancels every pending job, e.g. when the command dialog is closed."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+            self._jobs.clear()
+            self._finished.clear()
+        for job in jobs:
+            job.cancel()
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs whose callbacks have not run yet."""
+        return len(self._jobs)
+
+    def _run(self, job: BackgroundJob, work: Callable, args: tuple):
+        # Worker thread, only pure Python from here on. The outcome is returned
+        # for wait, and handed to _dispatch unless the job was waited for.
+        if job.cancelled:
+            return None
+        try:
+            outcome = (True, work(*args))
+        except Exception as error:
+            outcome = (False, error)
+
+        with self._lock:
+            if job.cancelled or job.id not in self._jobs:
+                return outcome
+            self._finished[job.id] = outcome
+
+        # fireCustomEvent is the one API call that is safe from another thread.
+        adsk.core.Application.get().fireCustomEvent(self.event_id, str(job.id))
+        return outcome
+
+    def _dispatch(self, args: adsk.core.CustomEventArgs):
+        # Main thread.
+        job_id = int(args.additionalInfo)
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            outcome = self._finished.pop(job_id, None)
+        if job is None or outcome is None or job.cancelled:
+            return
+
+        succeeded, value = outcome
+        if succeeded:
+            if job.on_done:
+                job.on_done(value)
+        elif job.on_error:
+            job.on_error(value)
+        else:
+            log(f'Background job {job_id} failed: {value!r}', adsk.core.LogLevels.ErrorLogLevel)
@@ -0,0 +1,149 @@
+import csv
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Attempt to read PROFILE flag from parent config.
+try:
+    from ... import config
+    _enabled = config.PROFILE
+except:
+    _enabled = False
+
+# Number of samples kept per timer, older samples are dropped.
+MAX_SAMPLES = 10000
+
+# Upper bounds in milliseconds of the histogram buckets, the last bucket is open.
+HISTOGRAM_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000)
+
+_calls = {}
+_samples = {}
+_counters = {}
+
+
+def enable_profiling(enabled: bool = True):
+    """Turns the collection of handler timings and API call counters on or off.
+
+    When disabled every profiling call returns after checking a single flag.
+    """
+    global _enabled
+    _enabled = enabled
+
+
+def is_profiling() -> bool:
+    """Returns True if profiling is enabled."""
+    return _enabled
+
+
+def reset_profile():
+    """Clears all timings and counters."""
+    _calls.clear()
+    _samples.clear()
+    _counters.clear()
+
+
+def record_time(name: str, seconds: float):
+    """Records one timed call.
+
+    Arguments:
+    name -- The name of the timer, e.g. the event handler.
+    seconds -- The wall time of the call.
+    """
+    if not _enabled:
+        return
+    _calls[name] = _calls.get(name, 0) + 1
+    samples = _samples.get(name)
+    if samples is None:
+        samples = _samples[name] = deque(maxlen=MAX_SAMPLES)
+    samples.append(seconds)
+
+
+def count_call(name: str, count: int = 1):
+    """Increments a counter, used to count API calls such as MoveFeature creation.
+
+    Arguments:
+    name -- The name of the counter.
+    count -- The amount to add.
+    """
+    if not _enabled:
+        return
+    _counters[name] = _counters.get(name, 0) + count
+
+
+@contextmanager
+def profile(name: str):
+    """Times the body of the with block under the given name."""
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_time(name, time.perf_counter() - start)
+
+
+def profile_report() -> dict:
+    """Returns the collected timings and counters.
+
+    Timings are reported in milliseconds with the call count, total, p50, p95, max
+    and a histogram whose keys are the bucket upper bounds.
+    """
+    timings = {}
+    for name, samples in _samples.items():
+        ordered = sorted(samples)
+        histogram = dict.fromkeys([f'<{bound}' for bound in HISTOGRAM_BUCKETS_MS] + ['more'], 0)
+        for seconds in ordered:
+            histogram[_bucket(seconds * 1000)] += 1
+
+        timings[name] = {
+            'calls': _calls[name],
+            'total_ms': sum(ordered) * 1000,
+            'p50_ms': _percentile(ordered, 0.50) * 1000,
+            'p95_ms': _percentile(ordered, 0.95) * 1000,
+            'max_ms': ordered[-1] * 1000,
+            'histogram': histogram,
+        }
+
+    return {'timings': timings, 'counters': dict(_counters)}
+
+
+def export_profile(path: str):
+    """Writes profile_report() to a file, as CSV if the path ends with .csv and as
+    JSON otherwise.
+
+    Arguments:
+    path -- The file to write.
+    """
+    report = profile_report()
+
+    if os.path.splitext(path)[1].lower() != '.csv':
+        with open(path, 'w') as file:
+            json.dump(report, file, indent=2)
+        return
+
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['kind', 'name', 'calls', 'total_ms', 'p50_ms', 'p95_ms', 'max_ms'])
+        for name, timing in report['timings'].items():
+            writer.writerow([
+                'timing', name, timing['calls'], f"{timing['total_ms']:.3f}",
+                f"{timing['p50_ms']:.3f}", f"{timing['p95_ms']:.3f}", f"{timing['max_ms']:.3f}"
+            ])
+        for name, count in report['counters'].items():
+            writer.writerow(['counter', name, count, '', '', '', ''])
+
+
+def _percentile(ordered: list, fraction: float) -> float:
+    # Nearest rank percentile of an already sorted list.
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _bucket(milliseconds: float) -> str:
+    for bound in HISTOGRAM_BUCKETS_MS:
+        if milliseconds < bound:
+            return f'<{bound}'
+    return 'more'
@@ -0,0 +1,8 @@
+from .occurrence_index import *
+from .face_ranking import *
+from .geometry_cache import *
+from .plan_file import *
+from .execution import *
+from .preview import *
+from .bulk_report import *
+from . import transform
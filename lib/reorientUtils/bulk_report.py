@@ -0,0 +1,66 @@
+# Summary of a bulk reorientation over many documents.
+#
+# One DocumentResult is recorded per processed document; the report keeps only
+# these plain values, never the documents themselves, so it can grow over
+# hundreds of files without holding on to Fusion objects.
+
+import json
+from collections import namedtuple
+
+# Outcome of one document: its name, the seconds spent opening, reorienting,
+# saving and closing it, the number of components reoriented and skipped, and
+# the error that stopped it, empty when it succeeded.
+DocumentResult = namedtuple('DocumentResult', 'name seconds reoriented skipped error')
+
+
+class BulkReport:
+    """Per-document timing and failures of a bulk reorientation."""
+
+    def __init__(self):
+        self.results = []
+
+    def add(self, result: DocumentResult):
+        self.results.append(result)
+
+    @property
+    def failures(self) -> list:
+        """The results of the documents that failed."""
+        return [result for result in self.results if result.error]
+
+    @property
+    def seconds(self) -> float:
+        """Total seconds spent on the documents."""
+        return sum(result.seconds for result in self.results)
+
+    def summary(self) -> str:
+        """Returns the report as text, one line per document followed by the
+        totals."""
+        lines = []
+        for result in self.results:
+            if result.error:
+                lines.append(f'{result.name}: FAILED after {result.seconds:.2f} s: {result.error}')
+            else:
+                lines.append(
+                    f'{result.name}: {result.reoriented} reoriented, {result.skipped} skipped in {result.seconds:.2f} s'
+                )
+        failed = len(self.failures)
+        lines.append(
+            f'{len(self.results) - failed} of {len(self.results)} documents reoriented in {self.seconds:.2f} s, '
+            f'{failed} failed'
+        )
+        return '\n'.join(lines)
+
+    def write(self, path: str):
+        """Writes the report as JSON.
+
+        Arguments:
+        path -- The file to write.
+        """
+        failed = len(self.failures)
+        with open(path, 'w') as file:
+            json.dump({
+                'documents': len(self.results),
+                'failed': failed,
+                'seconds': self.seconds,
+                'results': [result._asdict() for result in self.results],
+            }, file, indent=1)
@@ -0,0 +1,69 @@
+# Ordered steps applied to a design as one unit, with rollback on failure.
+#
+# The steps are plain callables, this module does not know about adsk. The
+# commands build the steps in their pipeline and execute the plan inside a
+# deferred compute scope so the design is solved once.
+
+from contextlib import nullcontext
+
+
+class ExecutionPlan:
+    """A list of steps applied in order as one unit.
+
+    Each step has an apply callable, whose return value is handed to the step's
+    undo callable when the plan has to be rolled back. If any step raises, the
+    steps already applied are undone in reverse order and the error is re-raised.
+    """
+
+    def __init__(self):
+        self._steps = []
+        self.applied = 0
+        self.rollback_errors = []
+
+    def add(self, description: str, apply, undo=None):
+        """Appends a step to the plan.
+
+        Arguments:
+        description -- Short text used in error reports.
+        apply -- Callable taking no argument that performs the step.
+        undo -- Optional callable taking the return value of apply, that reverts
+                the step.
+        """
+        self._steps.append((description, apply, undo))
+
+    def execute(self, scope=None):
+        """Applies every step.
+
+        Arguments:
+        scope -- Optional context manager the steps are applied in, e.g. a
+                 deferred compute scope.
+        """
+        done = []
+        with scope if scope is not None else nullcontext():
+            try:
+                for description, apply, undo in self._steps:
+                    done.append((description, undo, apply()))
+            except Exception:
+                self.applied = len(done)
+                self._rollback(done)
+                raise
+            self.applied = len(done)
+
+    def describe(self) -> list:
+        """Returns the descriptions of the steps in order."""
+        return [description for description, _, _ in self._steps]
+
+    def _rollback(self, done: list):
+        # Undo as much as possible, a failing undo must not hide the original error.
+        self.rollback_errors = []
+        for description, undo, result in reversed(done):
+            if undo is None:
+                continue
+            try:
+                undo(result)
+            except Exception as error:
+                self.rollback_errors.append((description, error))
+        done.clear()
+
+    def __len__(self):
+        return len(self._steps)
@@ -0,0 +1,136 @@
+# Ranking of planar faces as candidates for the face a body should rest on.
+#
+# Like the rest of reorientUtils this module works on plain tuples and never
+# imports adsk. The Fusion specific part, collecting the candidates from a body,
+# lives in the command pipeline.
+
+import math
+from collections import OrderedDict, namedtuple
+
+# A planar face of a body. index is the position of the face in body.faces, center
+# and normal are (x, y, z) tuples with the normal pointing out of the body.
+FaceCandidate = namedtuple('FaceCandidate', 'index area center normal')
+
+# A ranked candidate. Higher scores are better.
+RankedFace = namedtuple('RankedFace', 'score index area stability height')
+
+# Relative weight of each criterion in the score.
+DEFAULT_WEIGHTS = {
+    'area': 1.0,
+    'stability': 1.0,
+    'height': 0.5,
+}
+
+# Relative tolerance used to decide that no point of the body lies below a face.
+SUPPORT_TOLERANCE = 1e-6
+
+
+def rank_faces(candidates, points, center_of_mass, weights: dict = None) -> list:
+    """Ranks the candidate faces, best first.
+
+    Each face is scored on its area, how close the body's center of mass sits to
+    the face center once laid down (a stand in for being inside the support
+    polygon) and how low the body ends up. Faces the body would not rest on,
+    because part of the body lies below their plane, are only kept when no face
+    qualifies.
+
+    Arguments:
+    candidates -- Iterable of FaceCandidate.
+    points -- (x, y, z) points of the body used to measure the resulting height,
+              typically its vertices.
+    center_of_mass -- (x, y, z) of the body's center of mass.
+    weights -- Optional overrides of DEFAULT_WEIGHTS.
+    """
+    candidates = list(candidates)
+    if not candidates:
+        return []
+
+    weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+    points = list(points) + [candidate.center for candidate in candidates]
+
+    measured = []
+    for candidate in candidates:
+        lowest, height = _extent_along(points, candidate.center, candidate.normal)
+        stability = _stability(candidate, center_of_mass)
+        supported = lowest >= -SUPPORT_TOLERANCE * max(height, 1.0)
+        measured.append((candidate, stability, height, supported))
+
+    if any(supported for *_, supported in measured):
+        measured = [entry for entry in measured if entry[3]]
+
+    max_area = max(candidate.area for candidate, *_ in measured) or 1.0
+    heights = [height for _, _, height, _ in measured if height > 0.0]
+    min_height = min(heights) if heights else 0.0
+
+    ranked = []
+    for candidate, stability, height, _ in measured:
+        height_score = min_height / height if height > 0.0 else 1.0
+        score = (
+            weights['area'] * candidate.area / max_area
+            + weights['stability'] * stability
+            + weights['height'] * height_score
+        )
+        ranked.append(RankedFace(score, candidate.index, candidate.area, stability, height))
+
+    ranked.sort(key=lambda ranked_face: ranked_face.score, reverse=True)
+    return ranked
+
+
+class FaceRankingCache:
+    """Bounded cache of face rankings keyed by body identity and version.
+
+    Arguments:
+    max_entries -- Number of rankings kept before the least recently used one is
+                   dropped.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._rankings = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Returns the cached ranking for the key, or None."""
+        ranking = self._rankings.get(key)
+        if ranking is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._rankings.move_to_end(key)
+        return ranking
+
+    def put(self, key, ranking: list):
+        """Stores a ranking, evicting the oldest entries past max_entries."""
+        self._rankings[key] = ranking
+        self._rankings.move_to_end(key)
+        while len(self._rankings) > self.max_entries:
+            self._rankings.popitem(last=False)
+
+    def clear(self):
+        """Drops every cached ranking."""
+        self._rankings.clear()
+
+    def __len__(self):
+        return len(self._rankings)
+
+
+def _extent_along(points, origin, normal) -> tuple:
+    # Heights of the points above the face plane once the face normal points
+    # down. Returns the lowest and highest.
+    nx, ny, nz = normal
+    ox, oy, oz = origin
+    heights = [-((x - ox) * nx + (y - oy) * ny + (z - oz) * nz) for x, y, z in points]
+    return min(heights), max(heights)
+
+
+def _stability(candidate: FaceCandidate, center_of_mass) -> float:
+    # 1 when the center of mass projects onto the face center, falling to 0 when
+    # the projection is as far away as the face is wide.
+    nx, ny, nz = candidate.normal
+    dx, dy, dz = (g - c for g, c in zip(center_of_mass, candidate.center))
+    along = dx * nx + dy * ny + dz * nz
+    offset = math.sqrt(max(dx * dx + dy * dy + dz * dz - along * along, 0.0))
+    size = math.sqrt(candidate.area) if candidate.area > 0.0 else 1.0
+    return max(0.0, 1.0 - offset / size)
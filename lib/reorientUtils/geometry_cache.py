@@ -0,0 +1,86 @@
+# Cache of measured face and body geometry.
+#
+# Keys are built by the caller from the entity token of the face or body; the
+# cache adds its version, which is bumped whenever the document may have changed,
+# so stale geometry is never returned. Like the rest of reorientUtils this module
+# does not import adsk.
+
+import sys
+from collections import OrderedDict, namedtuple
+
+# Centroid and normal as (x, y, z) tuples, and area of a planar face.
+FaceGeometry = namedtuple('FaceGeometry', 'center normal area')
+
+# Bounding box corners, points used to measure heights (typically the vertices)
+# and center of mass of a body, all (x, y, z) tuples.
+BodyGeometry = namedtuple('BodyGeometry', 'min_point max_point points center_of_mass')
+
+
+class GeometryCache:
+    """LRU cache of geometry, bounded both in entries and in estimated memory.
+
+    Arguments:
+    max_entries -- Number of entries kept before the least recently used ones are
+                   dropped.
+    max_bytes -- Estimated memory of the cached values above which the least
+                 recently used entries are dropped.
+    """
+
+    def __init__(self, max_entries: int = 20000, max_bytes: int = 16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+
+    def get(self, token: str):
+        """Returns the value cached for the token in the current version, or None."""
+        key = (token, self.version)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, token: str, value):
+        """Caches a value for the token in the current version and returns it."""
+        key = (token, self.version)
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[1]
+
+        size = _estimate_size(value)
+        self._entries[key] = (value, size)
+        self._bytes += size
+
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+        return value
+
+    def invalidate(self):
+        """Starts a new version, dropping everything cached so far. Called when the
+        document changes or another document becomes active."""
+        self.version += 1
+        self._entries.clear()
+        self._bytes = 0
+
+    @property
+    def memory(self) -> int:
+        """Estimated memory used by the cached values, in bytes."""
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _estimate_size(value) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        size += sum(_estimate_size(item) for item in value)
+    return size
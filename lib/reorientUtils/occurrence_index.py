@@ -0,0 +1,106 @@
+# Component -> occurrence index used by the reorient commands.
+#
+# This module only relies on attribute access of the objects handed to it, it
+# never imports adsk, so it can be exercised against a stand-in object model.
+
+
+def component_key(component):
+    """Returns a hashable key identifying a component.
+
+    Arguments:
+    component -- The component (or a stand-in exposing an id attribute).
+    """
+    key = getattr(component, 'id', None)
+    return key if key else id(component)
+
+
+class OccurrenceIndex:
+    """Index of the occurrences of every component of a design.
+
+    It is built with a single pass over root_comp.allOccurrences the first time
+    it is needed, and replaces the walks of allOccurrences and
+    allOccurrencesByComponent done per lookup. The index is bound to one design
+    and is kept across command sessions: it only has to be invalidated when the
+    design may have gained or lost occurrences, or when another document becomes
+    active.
+
+    Only the occurrences are kept, their transforms are always read from the
+    API since they can change without the index being invalidated.
+    """
+
+    def __init__(self):
+        self._design = None
+        self._by_component = None
+        self.builds = 0
+
+    def reset(self, design=None):
+        """Drops the index and binds it to the given design.
+
+        Arguments:
+        design -- The design the following lookups are made against.
+        """
+        self._design = design
+        self._by_component = None
+
+    def bind(self, design):
+        """Binds the index to the given design, keeping the built index when it
+        already belongs to that design.
+
+        Arguments:
+        design -- The design the following lookups are made against.
+        """
+        if self._design is None or design is None or self._design != design:
+            self.reset(design)
+
+    def invalidate(self):
+        """Drops the index, it is built again on the next lookup."""
+        self._by_component = None
+
+    def lookup(self, body):
+        """Returns the occurrence that owns the body, or None.
+
+        A body selected in the context of an assembly is a proxy whose
+        assemblyContext is the owning occurrence, so that is used directly.
+        Native bodies resolve to the first occurrence of their component.
+
+        Arguments:
+        body -- The body (usually face.body of a selected face).
+        """
+        if body is None:
+            return None
+
+        occurrence = getattr(body, 'assemblyContext', None)
+        if occurrence:
+            return occurrence
+        return self.first(body.parentComponent)
+
+    def first(self, component):
+        """Returns the first occurrence of the component, or None.
+
+        Arguments:
+        component -- The component.
+        """
+        occurrences = self.occurrences(component)
+        return occurrences[0] if occurrences else None
+
+    def occurrences(self, component) -> list:
+        """Returns every occurrence of the component, in the order of
+        root_comp.allOccurrences.
+
+        Arguments:
+        component -- The component.
+        """
+        if self._by_component is None:
+            self._build()
+        return self._by_component.get(component_key(component), [])
+
+    def _build(self):
+        self._by_component = {}
+        self.builds += 1
+        if self._design is None:
+            return
+
+        # One pass over the assembly. The lists keep the order of allOccurrences,
+        # so the first occurrence is the one a scan of allOccurrences would find.
+        for occ in self._design.rootComponent.allOccurrences:
+            self._by_component.setdefault(component_key(occ.component), []).append(occ)
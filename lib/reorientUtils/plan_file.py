@@ -0,0 +1,124 @@
+# Reorientation plans saved to a file and replayed later.
+#
+# A plan file lists, per component, the transform that was applied to its
+# contents, so the same reorientation can be applied again to a later revision of
+# the design without evaluating faces. Plans are written as JSON, or in a compact
+# binary layout when the file name ends in .bin.
+
+import json
+import struct
+from collections import namedtuple
+
+# One reorientation: the component identified by its id (and name, used when the
+# id is not found), the token of the face it was laid on, the body transform that
+# was applied and the triad part of it, both rutil.transform tuples.
+PlanRecord = namedtuple('PlanRecord', 'component_id component_name face_token transform triad')
+
+PLAN_FORMAT_VERSION = 1
+
+_MAGIC = b'RPLN'
+_HEADER = struct.Struct('<4sHI')
+_MATRICES = struct.Struct('<32d')
+_LENGTH = struct.Struct('<H')
+
+
+def write_plan(path: str, records) -> int:
+    """Writes plan records to a file and returns the number of records written.
+
+    Arguments:
+    path -- The file to write, binary when it ends in .bin and JSON otherwise.
+    records -- Iterable of PlanRecord.
+    """
+    records = list(records)
+    if path.lower().endswith('.bin'):
+        with open(path, 'wb') as file:
+            file.write(_HEADER.pack(_MAGIC, PLAN_FORMAT_VERSION, len(records)))
+            for record in records:
+                for text in (record.component_id, record.component_name, record.face_token):
+                    data = text.encode('utf-8')
+                    file.write(_LENGTH.pack(len(data)))
+                    file.write(data)
+                file.write(_MATRICES.pack(*record.transform, *record.triad))
+    else:
+        with open(path, 'w') as file:
+            json.dump({
+                'version': PLAN_FORMAT_VERSION,
+                'records': [record._asdict() for record in records],
+            }, file, indent=1)
+    return len(records)
+
+
+def read_plan(path: str) -> list:
+    """Reads the plan records written by write_plan.
+
+    Raises ValueError when the file is not a plan, is damaged or was written by
+    a newer version.
+
+    Arguments:
+    path -- The file to read, binary when it ends in .bin and JSON otherwise.
+    """
+    try:
+        if path.lower().endswith('.bin'):
+            return _read_binary_plan(path)
+        return _read_json_plan(path)
+    except (struct.error, TypeError) as error:
+        raise ValueError(f'{path} is damaged: {error}') from error
+
+
+def _read_binary_plan(path: str) -> list:
+    with open(path, 'rb') as file:
+        data = file.read()
+    magic, version, count = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise ValueError(f'{path} is not a reorientation plan.')
+    _check_version(path, version)
+
+    records = []
+    offset = _HEADER.size
+    for _ in range(count):
+        texts = []
+        for _ in range(3):
+            (length,) = _LENGTH.unpack_from(data, offset)
+            offset += _LENGTH.size
+            if offset + length > len(data):
+                raise ValueError(f'{path} is truncated.')
+            texts.append(data[offset:offset + length].decode('utf-8'))
+            offset += length
+        matrices = _MATRICES.unpack_from(data, offset)
+        offset += _MATRICES.size
+        records.append(PlanRecord(*texts, matrices[:16], matrices[16:]))
+    return records
+
+
+def _read_json_plan(path: str) -> list:
+    with open(path) as file:
+        content = json.load(file)
+    if not isinstance(content, dict) or not isinstance(content.get('records'), list):
+        raise ValueError(f'{path} is not a reorientation plan.')
+    _check_version(path, content.get('version', 0))
+
+    records = []
+    for record in content['records']:
+        if not isinstance(record, dict):
+            raise ValueError(f'{path} has a record that is not an object.')
+        records.append(PlanRecord(
+            str(record['component_id']),
+            str(record['component_name']),
+            str(record['face_token']),
+            _read_matrix(path, record['transform']),
+            _read_matrix(path, record['triad']),
+        ))
+    return records
+
+
+def _read_matrix(path: str, values) -> tuple:
+    # A transform stored in a JSON plan, 16 numbers in row-major order.
+    matrix = tuple(float(value) for value in values)
+    if len(matrix) != 16:
+        raise ValueError(f'{path} has a transform of {len(matrix)} values instead of 16.')
+    return matrix
+
+
+def _check_version(path: str, version: int):
+    if version > PLAN_FORMAT_VERSION:
+        raise ValueError(f'{path} was written by a newer version of the add-in.')
@@ -0,0 +1,122 @@
+# Scheduling of the reorient command previews during triad drags.
+#
+# Fusion fires executePreview for every triad update and rolls the previous
+# preview back each time. The scheduler decides, per event, whether the full
+# preview is rendered, whether the last fully rendered state is shown again, or
+# whether a cheap outline stands in for the body. Like the rest of reorientUtils
+# this module does not import adsk.
+
+import time
+
+# Preview kinds returned by PreviewScheduler.next_preview.
+FULL_PREVIEW = 'full'
+LAST_PREVIEW = 'last'
+OUTLINE_PREVIEW = 'outline'
+
+# Corner indices of the 12 edges of a box whose corners are ordered as in
+# box_corners.
+BOX_EDGES = (
+    (0, 1), (1, 3), (3, 2), (2, 0),
+    (4, 5), (5, 7), (7, 6), (6, 4),
+    (0, 4), (1, 5), (2, 6), (3, 7),
+)
+
+
+def box_corners(min_point, max_point) -> list:
+    """Returns the 8 corners of an axis aligned box as (x, y, z) tuples, X
+    varying fastest, then Y, then Z.
+
+    Arguments:
+    min_point -- The (x, y, z) minimum corner.
+    max_point -- The (x, y, z) maximum corner.
+    """
+    return [
+        (x, y, z)
+        for z in (min_point[2], max_point[2])
+        for y in (min_point[1], max_point[1])
+        for x in (min_point[0], max_point[0])
+    ]
+
+
+class PreviewScheduler:
+    """Coalesces the previews of a triad drag.
+
+    The command calls moved when the triad changes and next_preview from its
+    executePreview handler. While the triad is being dragged the full preview is
+    rendered at most max_rate times per second; the events in between show the
+    last rendered state again. With low_fidelity the drag only shows an outline
+    of the body. The API does not report the release of the triad, so the drag is
+    considered released once the triad did not move for settle_time, and the
+    command then renders the latest state in full, see release_delay.
+
+    Arguments:
+    max_rate -- Full previews per second during a drag, 0 for no limit.
+    low_fidelity -- Show an outline instead of the full preview during drags.
+    settle_time -- Seconds without triad changes after which the drag is over.
+    clock -- Returns the current time in seconds.
+    """
+
+    def __init__(self, max_rate: float = 0.0, low_fidelity: bool = False, settle_time: float = 0.15, clock=time.perf_counter):
+        self.max_rate = max_rate
+        self.low_fidelity = low_fidelity
+        self.settle_time = settle_time
+        self.full = 0
+        self.coalesced = 0
+        self.outlines = 0
+        self._clock = clock
+        self._dragging = False
+        self._pending = False
+        self._last_move = None
+        self._last_full = None
+
+    @property
+    def dragging(self) -> bool:
+        return self._dragging
+
+    @property
+    def pending(self) -> bool:
+        """True when the latest state has not been rendered in full yet."""
+        return self._pending
+
+    def moved(self):
+        """Records a triad change."""
+        self._dragging = True
+        self._last_move = self._clock()
+
+    def next_preview(self) -> str:
+        """Returns how the current executePreview event should be rendered,
+        FULL_PREVIEW, LAST_PREVIEW or OUTLINE_PREVIEW.
+
+        LAST_PREVIEW is only returned after a full preview was rendered.
+        """
+        now = self._clock()
+        if self._dragging:
+            if self.low_fidelity:
+                self._pending = True
+                self.outlines += 1
+                return OUTLINE_PREVIEW
+            if self._last_full is not None and self.max_rate > 0 and now - self._last_full < 1.0 / self.max_rate:
+                self._pending = True
+                self.coalesced += 1
+                return LAST_PREVIEW
+
+        self._pending = False
+        self._last_full = now
+        self.full += 1
+        return FULL_PREVIEW
+
+    def release_delay(self):
+        """Returns the seconds left until the drag counts as released, 0 when it
+        is released and the latest state has to be rendered in full, or None
+        when there is nothing left to render."""
+        if not self._pending:
+            return None
+        if self._dragging:
+            remaining = self._last_move + self.settle_time - self._clock()
+            if remaining > 0:
+                return remaining
+        return 0.0
+
+    def release(self):
+        """Ends the drag, the next preview is rendered in full."""
+        self._dragging = False
@@ -0,0 +1,292 @@
+# Alignment math for the reorient commands.
+#
+# Transforms are stored as flat tuples of 16 floats in row-major order, the same
+# layout adsk.core.Matrix3D.asArray() returns, and use the column vector
+# convention of Matrix3D (translation in the last column). All the math runs in
+# process; to_matrix3d/from_matrix3d are the only places adsk is touched, so this
+# module can be imported without Fusion.
+#
+# Single 4x4 operations are plain Python since that is faster than NumPy at this
+# size. The batched transform_many and transform_all_by are NumPy-backed when
+# NumPy is available and fall back to plain Python otherwise.
+
+import math
+
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+# Default absolute tolerance used by the identity and equality checks.
+TOLERANCE = 1e-9
+
+IDENTITY = (
+    1.0, 0.0, 0.0, 0.0,
+    0.0, 1.0, 0.0, 0.0,
+    0.0, 0.0, 1.0, 0.0,
+    0.0, 0.0, 0.0, 1.0,
+)
+
+# Face normals are aligned to this direction, so the face ends up on the XY plane
+# with the body above it.
+TARGET_NORMAL = (0.0, 0.0, -1.0)
+
+
+def identity() -> tuple:
+    """Returns the identity transform."""
+    return IDENTITY
+
+
+def translation(x: float, y: float, z: float) -> tuple:
+    """Returns a transform that translates by the given vector."""
+    return (
+        1.0, 0.0, 0.0, float(x),
+        0.0, 1.0, 0.0, float(y),
+        0.0, 0.0, 1.0, float(z),
+        0.0, 0.0, 0.0, 1.0,
+    )
+
+
+def multiply(a: tuple, b: tuple) -> tuple:
+    """Returns the product a * b, i.e. b is applied first and then a."""
+    return tuple(
+        a[r] * b[c] + a[r + 1] * b[c + 4] + a[r + 2] * b[c + 8] + a[r + 3] * b[c + 12]
+        for r in (0, 4, 8, 12)
+        for c in (0, 1, 2, 3)
+    )
+
+
+def transform_by(matrix: tuple, other: tuple) -> tuple:
+    """Same as Matrix3D.transformBy: returns matrix followed by other (other * matrix)."""
+    return multiply(other, matrix)
+
+
+def invert(matrix: tuple) -> tuple:
+    """Returns the inverse of a rigid transform (rotation and translation only).
+
+    Occurrence and body transforms are always rigid, so the inverse is the
+    transposed rotation combined with the back rotated translation.
+    """
+    m = matrix
+    tx, ty, tz = m[3], m[7], m[11]
+    return (
+        m[0], m[4], m[8], -(m[0] * tx + m[4] * ty + m[8] * tz),
+        m[1], m[5], m[9], -(m[1] * tx + m[5] * ty + m[9] * tz),
+        m[2], m[6], m[10], -(m[2] * tx + m[6] * ty + m[10] * tz),
+        0.0, 0.0, 0.0, 1.0,
+    )
+
+
+def rotate_to(from_vector, to_vector) -> tuple:
+    """Returns the rotation that turns from_vector onto to_vector.
+
+    Like Matrix3D.setToRotateTo the rotation is about the axis perpendicular to
+    both vectors. For opposite vectors any perpendicular axis is valid; the one
+    least aligned with from_vector is used.
+
+    Arguments:
+    from_vector -- (x, y, z) of the direction to rotate.
+    to_vector -- (x, y, z) of the direction to rotate onto.
+    """
+    fx, fy, fz = _normalize(from_vector)
+    tx, ty, tz = _normalize(to_vector)
+
+    # Rotation axis and the sine/cosine of the angle between the vectors.
+    ax, ay, az = fy * tz - fz * ty, fz * tx - fx * tz, fx * ty - fy * tx
+    s = math.sqrt(ax * ax + ay * ay + az * az)
+    c = fx * tx + fy * ty + fz * tz
+
+    if s < TOLERANCE:
+        if c > 0.0:
+            return IDENTITY
+        ax, ay, az = _perpendicular((fx, fy, fz))
+        s = 0.0
+        c = -1.0
+    else:
+        ax, ay, az = ax / s, ay / s, az / s
+
+    # Rodrigues' rotation formula.
+    t = 1.0 - c
+    return (
+        t * ax * ax + c, t * ax * ay - s * az, t * ax * az + s * ay, 0.0,
+        t * ax * ay + s * az, t * ay * ay + c, t * ay * az - s * ax, 0.0,
+        t * ax * az - s * ay, t * ay * az + s * ax, t * az * az + c, 0.0,
+        0.0, 0.0, 0.0, 1.0,
+    )
+
+
+def alignment(face_center, face_normal, target_normal=TARGET_NORMAL) -> tuple:
+    """Returns the transform that moves the face center to the origin and turns
+    the face normal onto target_normal.
+
+    Arguments:
+    face_center -- (x, y, z) of the face centroid.
+    face_normal -- (x, y, z) of the face normal at the centroid.
+    target_normal -- The direction the face normal should end up pointing to.
+    """
+    x, y, z = face_center
+    return multiply(rotate_to(face_normal, target_normal), translation(-x, -y, -z))
+
+
+def compensate(occurrence_transform: tuple, inverse_body_transform: tuple) -> tuple:
+    """Returns the occurrence transform that keeps a moved body in place.
+
+    Arguments:
+    occurrence_transform -- The current transform2 of the occurrence.
+    inverse_body_transform -- The inverse of the transform applied to the body.
+    """
+    return transform_by(inverse_body_transform, occurrence_transform)
+
+
+def transform_many(matrices, other: tuple) -> list:
+    """Applies transform_by(other, matrix) to every matrix in one pass.
+
+    Used for the occurrence compensation where the same inverse body transform is
+    post-multiplied by many occurrence transforms.
+
+    Arguments:
+    matrices -- Iterable of transforms.
+    other -- The transform the matrices are applied after.
+    """
+    matrices = list(matrices)
+    if not matrices:
+        return []
+
+    if _np is not None:
+        stacked = _np.asarray(matrices, dtype=float).reshape(-1, 4, 4)
+        result = _np.matmul(stacked, _np.asarray(other, dtype=float).reshape(4, 4))
+        return [tuple(row) for row in result.reshape(-1, 16).tolist()]
+
+    return [multiply(matrix, other) for matrix in matrices]
+
+
+def transform_all_by(matrices, other: tuple) -> list:
+    """Applies transform_by(matrix, other) to every matrix in one pass, i.e. moves
+    every matrix by other.
+
+    Arguments:
+    matrices -- Iterable of transforms.
+    other -- The transform applied after each matrix.
+    """
+    matrices = list(matrices)
+    if not matrices:
+        return []
+
+    if _np is not None:
+        stacked = _np.asarray(matrices, dtype=float).reshape(-1, 4, 4)
+        result = _np.matmul(_np.asarray(other, dtype=float).reshape(4, 4), stacked)
+        return [tuple(row) for row in result.reshape(-1, 16).tolist()]
+
+    return [multiply(other, matrix) for matrix in matrices]
+
+
+def transform_points(matrix: tuple, points) -> list:
+    """Returns the (x, y, z) points transformed by matrix.
+
+    Arguments:
+    matrix -- The transform tuple.
+    points -- The (x, y, z) points.
+    """
+    m = matrix
+    return [
+        (
+            m[0] * x + m[1] * y + m[2] * z + m[3],
+            m[4] * x + m[5] * y + m[6] * z + m[7],
+            m[8] * x + m[9] * y + m[10] * z + m[11],
+        )
+        for x, y, z in points
+    ]
+
+
+def is_equal(a: tuple, b: tuple, tolerance: float = TOLERANCE) -> bool:
+    """Returns True if every element of a and b are within the tolerance."""
+    return all(abs(x - y) <= tolerance for x, y in zip(a, b))
+
+
+def is_identity(matrix: tuple, tolerance: float = TOLERANCE) -> bool:
+    """Tolerance aware replacement for Matrix3D.isEqualTo(identity)."""
+    return is_equal(matrix, IDENTITY, tolerance)
+
+
+def orthonormalize(matrix: tuple) -> tuple:
+    """Returns the rigid transform closest to matrix, removing the scale and
+    shear that floating-point drift accumulates in repeatedly composed
+    rotations. The translation is kept.
+
+    The rotation columns are re-orthogonalized with Gram-Schmidt, X first.
+    """
+    m = matrix
+    x = _normalize((m[0], m[4], m[8]))
+    y = (m[1], m[5], m[9])
+    d = x[0] * y[0] + x[1] * y[1] + x[2] * y[2]
+    y = _normalize((y[0] - d * x[0], y[1] - d * x[1], y[2] - d * x[2]))
+    z = (x[1] * y[2] - x[2] * y[1], x[2] * y[0] - x[0] * y[2], x[0] * y[1] - x[1] * y[0])
+    return (
+        x[0], y[0], z[0], m[3],
+        x[1], y[1], z[1], m[7],
+        x[2], y[2], z[2], m[11],
+        0.0, 0.0, 0.0, 1.0,
+    )
+
+
+def snap(matrix: tuple, tolerance: float = TOLERANCE) -> tuple:
+    """Returns matrix with the rotation entries within tolerance of 0, 1 or -1
+    and the translation components within tolerance of 0 set to those values
+    exactly, so near axis-aligned results become exactly axis aligned.
+
+    The rotation is orthonormalized again when anything was snapped.
+    """
+    snapped = list(matrix)
+    changed = False
+    for i in (0, 1, 2, 4, 5, 6, 8, 9, 10):
+        value = snapped[i]
+        for target in (0.0, 1.0, -1.0):
+            if value != target and abs(value - target) <= tolerance:
+                snapped[i] = target
+                changed = True
+                break
+    for i in (3, 7, 11):
+        if snapped[i] != 0.0 and abs(snapped[i]) <= tolerance:
+            snapped[i] = 0.0
+            changed = True
+    return orthonormalize(tuple(snapped)) if changed else matrix
+
+
+def clean(matrix: tuple, tolerance: float = TOLERANCE) -> tuple:
+    """Orthonormalizes and snaps a rigid transform, see orthonormalize and snap."""
+    return snap(orthonormalize(matrix), tolerance)
+
+
+def from_matrix3d(matrix) -> tuple:
+    """Converts an adsk.core.Matrix3D into a transform tuple."""
+    return tuple(matrix.asArray())
+
+
+def to_matrix3d(matrix: tuple):
+    """Converts a transform tuple into a new adsk.core.Matrix3D."""
+    import adsk.core
+
+    result = adsk.core.Matrix3D.create()
+    result.setWithArray(list(matrix))
+    return result
+
+
+def _normalize(vector) -> tuple:
+    x, y, z = vector
+    length = math.sqrt(x * x + y * y + z * z)
+    if length < TOLERANCE:
+        raise ValueError('Cannot normalize a zero length vector.')
+    return x / length, y / length, z / length
+
+
+def _perpendicular(vector) -> tuple:
+    # Cross with the coordinate axis the vector is least aligned with.
+    x, y, z = vector
+    ax, ay, az = abs(x), abs(y), abs(z)
+    if ax <= ay and ax <= az:
+        px, py, pz = 0.0, z, -y
+    elif ay <= az:
+        px, py, pz = -z, 0.0, x
+    else:
+        px, py, pz = y, -x, 0.0
+    return _normalize((px, py, pz))